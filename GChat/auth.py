@@ -5,11 +5,48 @@ Authentication module for Google Chat API using Keycloak Workload Identity Feder
 import requests
 import json
 import os
+import hashlib
+import threading
+from urllib.parse import urlencode
+import functools
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+import diskcache
+import orjson
 from google.auth import external_account
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
+from google.oauth2 import credentials as oauth2_credentials
 import google.auth
-from config import KEYCLOAK_CONFIG, GOOGLE_CLOUD_CONFIG, GOOGLE_CHAT_CONFIG
+from config import (
+    GOOGLE_CLOUD_CONFIG,
+    KEYCLOAK_TOKEN_ENDPOINT, KEYCLOAK_CLIENT_ID, KEYCLOAK_CLIENT_SECRET,
+    CHAT_API_ENDPOINT, CHAT_SCOPES
+)
+
+# Disk cache for WIF-derived Google access tokens, shared across processes
+WIF_TOKEN_CACHE_DIR = os.path.expanduser("~/.cache/gchat-wif")
+WIF_TOKEN_MIN_TTL = timedelta(seconds=60)
+
+# Client credentials are fixed by config, so the token request body is a constant
+_KC_BODY = urlencode({
+    'grant_type': 'client_credentials',
+    'client_id': KEYCLOAK_CLIENT_ID,
+    'client_secret': KEYCLOAK_CLIENT_SECRET
+}).encode('ascii')
+_KC_HEADERS = {
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'Content-Length': str(len(_KC_BODY))
+}
+
+
+@functools.lru_cache(maxsize=4)
+def _load_wif_config(path: str, mtime_ns: int) -> dict:
+    """
+    Parse the WIF config file; mtime_ns is part of the cache key so edits invalidate it
+    """
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
 
 
 class KeycloakWIFAuth:
@@ -26,31 +63,21 @@ class KeycloakWIFAuth:
         """
         Get access token from Keycloak using client credentials flow
         """
-        token_data = {
-            'grant_type': 'client_credentials',
-            'client_id': KEYCLOAK_CONFIG['client_id'],
-            'client_secret': KEYCLOAK_CONFIG['client_secret']
-        }
-        
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
         try:
             response = requests.post(
-                KEYCLOAK_CONFIG['token_endpoint'],
-                data=token_data,
-                headers=headers
+                KEYCLOAK_TOKEN_ENDPOINT,
+                data=_KC_BODY,
+                headers=_KC_HEADERS
             )
             response.raise_for_status()
             
-            token_response = response.json()
+            token_response = orjson.loads(response.content)
             self.keycloak_token = token_response.get('access_token')
             
             print("Successfully obtained Keycloak token")
             return self.keycloak_token
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
             print(f"Error getting Keycloak token: {e}")
             raise
     
@@ -66,16 +93,27 @@ class KeycloakWIFAuth:
             # Set environment variable for Google Application Credentials
             os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = self.wif_config_file
             
-            # Load credentials from WIF config
-            credentials = external_account.Credentials.from_file(
-                self.wif_config_file,
-                scopes=GOOGLE_CHAT_CONFIG['scopes']
+            # Reuse a still-valid token minted by a previous process if available
+            cache_key = self._wif_cache_key()
+            cached_credentials = self._load_cached_credentials(cache_key)
+            if cached_credentials:
+                self.google_credentials = cached_credentials
+                print("Reusing cached WIF credentials")
+                return cached_credentials
+            
+            # Load credentials from the (cached) parsed WIF config
+            st = os.stat(self.wif_config_file)
+            info = _load_wif_config(self.wif_config_file, st.st_mtime_ns)
+            credentials = external_account.Credentials.from_info(
+                info,
+                scopes=CHAT_SCOPES
             )
             
             # Refresh credentials to get access token
             request = Request()
             credentials.refresh(request)
             
+            self._store_cached_credentials(cache_key, credentials)
             self.google_credentials = credentials
             print("Successfully set up WIF credentials")
             return credentials
@@ -84,6 +122,69 @@ class KeycloakWIFAuth:
             print(f"Error setting up WIF credentials: {e}")
             raise
     
+    def _wif_cache_key(self):
+        """
+        Build the disk cache key for the current WIF config, scopes and Keycloak subject
+        """
+        mtime = os.path.getmtime(self.wif_config_file)
+        subject = hashlib.sha256(KEYCLOAK_CLIENT_ID.encode('utf-8')).hexdigest()
+        raw_key = repr((os.path.abspath(self.wif_config_file), mtime, CHAT_SCOPES, subject))
+        return hashlib.sha256(raw_key.encode('utf-8')).hexdigest()
+    
+    def _open_token_cache(self):
+        """
+        Open the WIF token disk cache in a directory only the current user can read
+        """
+        os.makedirs(WIF_TOKEN_CACHE_DIR, mode=0o700, exist_ok=True)
+        # makedirs leaves the mode of an existing directory alone
+        os.chmod(WIF_TOKEN_CACHE_DIR, 0o700)
+        return diskcache.Cache(WIF_TOKEN_CACHE_DIR)
+    
+    def _load_cached_credentials(self, cache_key):
+        """
+        Load cached Google credentials if they remain valid for at least WIF_TOKEN_MIN_TTL
+        """
+        try:
+            with self._open_token_cache() as cache:
+                entry = cache.get(cache_key)
+            if not entry:
+                return None
+            
+            token, expiry_iso = entry
+            expiry = datetime.fromisoformat(expiry_iso)
+            if expiry.tzinfo is None:
+                expiry = expiry.replace(tzinfo=timezone.utc)
+            if expiry <= datetime.now(timezone.utc) + WIF_TOKEN_MIN_TTL:
+                return None
+            
+            # google-auth compares expiry against naive UTC
+            return oauth2_credentials.Credentials(
+                token=token,
+                expiry=expiry.replace(tzinfo=None),
+                scopes=CHAT_SCOPES
+            )
+        except Exception as e:
+            print(f"Ignoring unreadable WIF token cache: {e}")
+            return None
+    
+    def _store_cached_credentials(self, cache_key, credentials):
+        """
+        Persist a freshly refreshed Google access token for reuse by later processes
+        """
+        if not credentials.token or not credentials.expiry:
+            return
+        
+        try:
+            # google-auth reports expiry as naive UTC
+            expiry = credentials.expiry
+            if expiry.tzinfo is None:
+                expiry = expiry.replace(tzinfo=timezone.utc)
+            ttl = (expiry - datetime.now(timezone.utc)).total_seconds()
+            with self._open_token_cache() as cache:
+                cache.set(cache_key, (credentials.token, expiry.isoformat()), expire=max(ttl, 0))
+        except Exception as e:
+            print(f"Could not write WIF token cache: {e}")
+    
     def get_google_access_token(self):
         """
         Get Google access token using WIF
@@ -94,8 +195,12 @@ class KeycloakWIFAuth:
         if self.google_credentials:
             # Refresh token if needed
             if not self.google_credentials.valid:
-                request = Request()
-                self.google_credentials.refresh(request)
+                if isinstance(self.google_credentials, oauth2_credentials.Credentials):
+                    # Cached tokens carry no refresh material, so redo the WIF setup
+                    self.setup_wif_credentials()
+                else:
+                    request = Request()
+                    self.google_credentials.refresh(request)
             
             return self.google_credentials.token
         
@@ -141,7 +246,7 @@ class KeycloakWIFAuth:
             }
             
             # Make a test call to list spaces (this will require appropriate permissions)
-            test_url = f"{GOOGLE_CHAT_CONFIG['api_endpoint']}/spaces"
+            test_url = f"{CHAT_API_ENDPOINT}/spaces"
             response = requests.get(test_url, headers=headers)
             
             if response.status_code == 200:
@@ -156,17 +261,36 @@ class KeycloakWIFAuth:
             return False
 
 
+_AUTH_SINGLETON: Optional[KeycloakWIFAuth] = None
+_AUTH_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _header_template():
+    """
+    Static part of the authenticated headers, built once per process
+    """
+    return (('Content-Type', 'application/json'),)
+
+
 def get_authenticated_headers():
     """
-    Convenience function to get authenticated headers for API calls
+    Convenience function to get authenticated headers for API calls.
+    Reuses a process-wide KeycloakWIFAuth that only re-authenticates when its token expires.
     """
-    auth = KeycloakWIFAuth()
-    access_token = auth.authenticate()
+    global _AUTH_SINGLETON
+    
+    with _AUTH_LOCK:
+        if _AUTH_SINGLETON is None:
+            auth = KeycloakWIFAuth()
+            access_token = auth.authenticate()
+            _AUTH_SINGLETON = auth
+        else:
+            access_token = _AUTH_SINGLETON.get_google_access_token()
     
-    return {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    headers = dict(_header_template())
+    headers['Authorization'] = f'Bearer {access_token}'
+    return headers
 
 
 if __name__ == "__main__":
@@ -2,8 +2,10 @@
 Configuration file for Google Chat API with Keycloak Workload Identity Federation
 """
 
+import types
+
 # Keycloak Configuration
-KEYCLOAK_CONFIG = {
+_KEYCLOAK_CONFIG = {
     "server_url": "http://localhost:9090",  # Update with your actual Keycloak server URL
     "realm": "OrderMgmt",  # Update with your actual realm name
     "client_id": "Googlechat-api-client",
@@ -12,7 +14,7 @@ KEYCLOAK_CONFIG = {
 }
 
 # Google Cloud Project Configuration
-GOOGLE_CLOUD_CONFIG = {
+_GOOGLE_CLOUD_CONFIG = {
     "project_number": "2112",  # Replace with your GCP project number
     "project_id": "OrderManagement",  # Replace with your GCP project ID
     "service_account_email": "21unning-crane-22-v6.iam.gserviceaccount.com",  # Update with actual SA email
@@ -22,7 +24,7 @@ GOOGLE_CLOUD_CONFIG = {
 }
 
 # Google Chat API Configuration
-GOOGLE_CHAT_CONFIG = {
+_GOOGLE_CHAT_CONFIG = {
     "api_endpoint": "https://chat.googleapis.com/v1",
     "user_email": "divakar30@drapps.dev",
     "scopes": [
@@ -33,8 +35,8 @@ GOOGLE_CHAT_CONFIG = {
 }
 
 # Workload Identity Federation Configuration
-WIF_CONFIG = {
-    "audience": f"//iam.googleapis.com/projects/{GOOGLE_CLOUD_CONFIG['project_number']}/locations/{GOOGLE_CLOUD_CONFIG['location']}/workloadIdentityPools/{GOOGLE_CLOUD_CONFIG['workload_identity_pool_id']}/providers/{GOOGLE_CLOUD_CONFIG['workload_identity_provider_id']}",
+_WIF_CONFIG = {
+    "audience": f"//iam.googleapis.com/projects/{_GOOGLE_CLOUD_CONFIG['project_number']}/locations/{_GOOGLE_CLOUD_CONFIG['location']}/workloadIdentityPools/{_GOOGLE_CLOUD_CONFIG['workload_identity_pool_id']}/providers/{_GOOGLE_CLOUD_CONFIG['workload_identity_provider_id']}",
     "subject_token_type": "urn:ietf:params:oauth:token-type:id_token",
     "token_url": "https://sts.googleapis.com/v1/token"
 }
@@ -42,3 +44,17 @@ WIF_CONFIG = {
 # File paths
 WIF_CONFIG_FILE = "wif-config.json"
 CREDENTIALS_FILE = "credentials.json"
+
+# Read-only views of the configuration dicts
+KEYCLOAK_CONFIG = types.MappingProxyType(_KEYCLOAK_CONFIG)
+GOOGLE_CLOUD_CONFIG = types.MappingProxyType(_GOOGLE_CLOUD_CONFIG)
+GOOGLE_CHAT_CONFIG = types.MappingProxyType(_GOOGLE_CHAT_CONFIG)
+WIF_CONFIG = types.MappingProxyType(_WIF_CONFIG)
+
+# Pre-extracted values used on hot authentication paths
+KEYCLOAK_TOKEN_ENDPOINT = _KEYCLOAK_CONFIG['token_endpoint']
+KEYCLOAK_CLIENT_ID = _KEYCLOAK_CONFIG['client_id']
+KEYCLOAK_CLIENT_SECRET = _KEYCLOAK_CONFIG['client_secret']
+CHAT_API_ENDPOINT = _GOOGLE_CHAT_CONFIG['api_endpoint']
+CHAT_SCOPES = tuple(_GOOGLE_CHAT_CONFIG['scopes'])
+WIF_AUDIENCE = _WIF_CONFIG['audience']
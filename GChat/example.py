@@ -2,11 +2,51 @@
 Example usage of Google Chat API with Keycloak Workload Identity Federation
 """
 
+import sys
 import time
+import asyncio
+import aiohttp
+from datetime import datetime, timezone
 from google_chat_client import GoogleChatClient, GoogleChatBot
 from config import GOOGLE_CHAT_CONFIG
 
 
+def _utc_now_iso() -> str:
+    """Current time in the RFC 3339 'Z' form the Chat API uses for createTime"""
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _create_time_key(value: str):
+    """
+    Comparable form of an RFC 3339 timestamp: (UTC datetime to the second, nanoseconds).
+    createTime carries 0, 3, 6 or 9 fractional digits, so the strings do not sort lexically.
+    """
+    base, rest = value[:19], value[19:]
+    fraction = ''
+    if rest.startswith('.'):
+        rest = rest[1:]
+        digits = len(rest) - len(rest.lstrip('0123456789'))
+        fraction, rest = rest[:digits], rest[digits:]
+    seconds = datetime.fromisoformat(base + rest.replace('Z', '+00:00')).astimezone(timezone.utc)
+    return seconds, int(fraction[:9].ljust(9, '0'))
+
+
+def _messages_after(messages, watermark: str):
+    """
+    Messages (newest first, as listed with orderBy 'createTime desc') created after watermark,
+    returned oldest first together with the advanced watermark
+    """
+    watermark_key = _create_time_key(watermark)
+    new_messages = [
+        m for m in messages
+        if m.get('createTime') and _create_time_key(m['createTime']) > watermark_key
+    ]
+    new_messages.reverse()
+    if new_messages:
+        watermark = new_messages[-1]['createTime']
+    return new_messages, watermark
+
+
 def example_basic_operations():
     """
     Demonstrate basic Google Chat API operations
@@ -159,19 +199,46 @@ def example_monitoring(space_name: str):
     # Monitor for 30 seconds
     import threading
     import time
+    from cachetools import TTLCache
     
     stop_monitoring = False
     
+    # Short-lived memo of list_messages replies keyed by (space_name, page_size)
+    messages_cache = TTLCache(maxsize=32, ttl=1.0)
+    min_interval, max_interval = 3, 30
+    
+    def cached_list_messages(space, page_size):
+        key = (space, page_size)
+        if key not in messages_cache:
+            # Newest first, so the page holds the latest messages rather than the oldest
+            messages_cache[key] = bot.client.list_messages(
+                space, page_size=page_size, order_by='createTime desc'
+            )
+        return messages_cache[key]
+    
     def monitor_with_timeout():
         nonlocal stop_monitoring
         start_time = time.time()
+        # Only messages created after monitoring started are reported
+        watermark = _utc_now_iso()
+        interval = min_interval
         
         try:
             while not stop_monitoring and (time.time() - start_time) < 30:
                 try:
-                    messages = bot.client.list_messages(space_name, page_size=5)
-                    # Simple monitoring logic here
-                    time.sleep(3)
+                    messages = cached_list_messages(space_name, 5).get('messages', [])
+                    new_messages, watermark = _messages_after(messages, watermark)
+                    
+                    if new_messages:
+                        for message in new_messages:
+                            message_callback(message)
+                        interval = min_interval
+                    else:
+                        # Back off while the space is idle
+                        interval = min(interval * 2, max_interval)
+                    
+                    remaining = 30 - (time.time() - start_time)
+                    time.sleep(max(0, min(interval, remaining)))
                 except Exception as e:
                     print(f"Monitoring error: {e}")
                     break
@@ -192,6 +259,97 @@ def example_monitoring(space_name: str):
         print("Monitoring stopped by user.")
 
 
+async def _monitor(space_name: str, session: aiohttp.ClientSession, stop_event: asyncio.Event,
+                   client: GoogleChatClient, callback, page_size: int = 5):
+    """
+    Poll one space on the shared event loop, backing off while it is idle
+    """
+    url = f"{client.base_url}/spaces/{space_name}/messages"
+    # Newest first, so the page holds the latest messages rather than the oldest
+    params = {'pageSize': page_size, 'orderBy': 'createTime desc'}
+    min_interval, max_interval = 3, 30
+    backoff = min_interval
+    # Only messages created after monitoring started are reported
+    watermark = _utc_now_iso()
+    refreshed = False
+    
+    while not stop_event.is_set():
+        # Token refresh is synchronous, so keep it off the event loop
+        headers = await asyncio.to_thread(client._get_headers)
+        async with session.get(url, headers=headers, params=params) as r:
+            if r.status == 401 and not refreshed:
+                await asyncio.to_thread(client._refresh_headers)
+                refreshed = True
+                continue
+            r.raise_for_status()
+            refreshed = False
+            data = await r.json()
+        
+        new_messages, watermark = _messages_after(data.get('messages', []), watermark)
+        
+        if new_messages:
+            for message in new_messages:
+                callback(message)
+            backoff = min_interval
+        else:
+            backoff = min(backoff * 2, max_interval)
+        
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=backoff)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _monitor_spaces(space_names, callback, timeout: float = 30):
+    """
+    Monitor several spaces concurrently over one pooled aiohttp session
+    """
+    client = GoogleChatClient()
+    stop_event = asyncio.Event()
+    connector = aiohttp.TCPConnector(limit=50, ttl_dns_cache=300)
+    
+    async with aiohttp.ClientSession(connector=connector) as session:
+        monitors = asyncio.gather(*(
+            _monitor(space_name, session, stop_event, client, callback)
+            for space_name in space_names
+        ))
+        try:
+            await asyncio.wait_for(monitors, timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            stop_event.set()
+
+
+def example_monitoring_async(space_name: str):
+    """
+    Demonstrate space monitoring with asyncio instead of a polling thread
+    """
+    print("\n\n=== Space Monitoring Demo (asyncio) ===\n")
+    print("Monitoring space for new messages for 30 seconds...")
+    print("Try sending a message in the chat to see it detected!")
+    
+    def message_callback(message):
+        """Handle new messages"""
+        sender = message.get('sender', {}).get('displayName', 'Unknown')
+        text = message.get('text', 'No text content')
+        timestamp = message.get('createTime', 'Unknown time')
+        
+        print("New message detected!")
+        print(f"  From: {sender}")
+        print(f"  Text: {text[:100]}...")
+        print(f"  Time: {timestamp}")
+        print("---")
+    
+    try:
+        asyncio.run(_monitor_spaces([space_name], message_callback, timeout=30))
+        print("Monitoring completed.")
+    except KeyboardInterrupt:
+        print("Monitoring stopped by user.")
+    except Exception as e:
+        print(f"Monitoring error: {e}")
+
+
 def main():
     """
     Main example function
@@ -213,7 +371,10 @@ def main():
             # Ask user if they want to see monitoring demo
             response = input("\nWould you like to see the monitoring demo? (y/n): ")
             if response.lower().startswith('y'):
-                example_monitoring(space_name)
+                if '--async' in sys.argv[1:]:
+                    example_monitoring_async(space_name)
+                else:
+                    example_monitoring(space_name)
         
         print("\n" + "=" * 60)
         print("Demo completed successfully! 🎉")
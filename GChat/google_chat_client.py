@@ -5,7 +5,7 @@ Provides methods to interact with Google Chat API using Keycloak WIF authenticat
 
 import requests
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Dict, Optional
 from auth import KeycloakWIFAuth
 from config import GOOGLE_CHAT_CONFIG
@@ -130,13 +130,18 @@ class GoogleChatClient:
         
         return self._make_request('POST', f'spaces/{space_name}/messages', data=message_data, params=params)
     
-    def list_messages(self, space_name: str, page_size: int = 25) -> Dict:
+    def list_messages(self, space_name: str, page_size: int = 25, filter: str = None,
+                      order_by: str = None) -> Dict:
         """
-        List messages in a space
+        List messages in a space, optionally filtered server-side (e.g. 'createTime > "..."')
         """
         params = {
             'pageSize': page_size
         }
+        if filter:
+            params['filter'] = filter
+        if order_by:
+            params['orderBy'] = order_by
         return self._make_request('GET', f'spaces/{space_name}/messages', params=params)
     
     def get_message(self, message_name: str) -> Dict:
@@ -298,27 +303,31 @@ class GoogleChatBot:
     def monitor_space(self, space_name: str, callback_function):
         """
         Monitor a space for new messages (basic polling implementation)
+        Only messages created after the newest one already seen are requested from the server.
         For production, consider using webhooks instead
         """
         import time
         
-        last_messages = set()
+        # Per-call watermark, so one bot can monitor several spaces; only messages created
+        # after monitoring starts are reported
+        watermark = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
         
         while True:
             try:
-                messages = self.client.list_messages(space_name)
-                current_messages = set()
+                # Oldest-first, so a backlog larger than one page is drained over later ticks
+                messages = self.client.list_messages(
+                    space_name,
+                    page_size=100,
+                    filter=f'createTime > "{watermark}"',
+                    order_by='createTime asc'
+                )
+                delta = messages.get('messages', [])
                 
-                if 'messages' in messages:
-                    for message in messages['messages']:
-                        message_id = message.get('name', '')
-                        current_messages.add(message_id)
-                        
-                        if message_id not in last_messages:
-                            # New message found
-                            callback_function(message)
+                for message in delta:
+                    callback_function(message)
+                if delta:
+                    watermark = delta[-1].get('createTime', watermark)
                 
-                last_messages = current_messages
                 time.sleep(5)  # Poll every 5 seconds
                 
             except KeyboardInterrupt:
@@ -328,7 +337,6 @@ class GoogleChatBot:
                 print(f"Error monitoring space: {e}")
                 time.sleep(10)  # Wait longer on error
 
-
 if __name__ == "__main__":
     # Test the client
     try:
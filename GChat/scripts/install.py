@@ -55,11 +55,17 @@ def install_dependencies():
     else:
         pip_cmd = "venv/bin/pip"
     
-    # Commands with their descriptions and whether soft failures are allowed
+    # Skip pip's self version check and interactive prompts for every invocation
+    os.environ.setdefault("PIP_DISABLE_PIP_VERSION_CHECK", "1")
+    os.environ.setdefault("PIP_NO_INPUT", "1")
+    os.environ.setdefault("PIP_PREFER_BINARY", "1")
+    
+    # Commands with their descriptions and whether soft failures are allowed.
+    # Requirements and the editable package are resolved in one pip run so the
+    # resolver and wheel cache are shared.
     commands = [
         (f"{pip_cmd} install --upgrade pip", "Upgrading pip", True),  # Allow soft failure for pip upgrade
-        (f"{pip_cmd} install -r requirements.txt", "Installing dependencies", False),
-        (f"{pip_cmd} install -e .", "Installing package in development mode", False)
+        (f"{pip_cmd} install -r requirements.txt -e .", "Installing dependencies and package in development mode", False)
     ]
     
     for cmd, desc, allow_soft_failure in commands:
@@ -3,14 +3,21 @@ Google Chat API with Keycloak Workload Identity Federation
 A Python package for integrating Google Chat API with Keycloak authentication
 """
 
+import importlib
+
 __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "divakar30@drapps.dev"
 
-from .auth import KeycloakWIFAuth
-from .client import GoogleChatClient, GoogleChatBot
 from .config import KEYCLOAK_CONFIG, GOOGLE_CLOUD_CONFIG, GOOGLE_CHAT_CONFIG
 
+# Heavy modules (requests, google.auth) are only imported on first attribute access
+_LAZY = {
+    'KeycloakWIFAuth': '.auth',
+    'GoogleChatClient': '.client',
+    'GoogleChatBot': '.client',
+}
+
 __all__ = [
     'KeycloakWIFAuth',
     'GoogleChatClient', 
@@ -18,4 +25,16 @@ __all__ = [
     'KEYCLOAK_CONFIG',
     'GOOGLE_CLOUD_CONFIG', 
     'GOOGLE_CHAT_CONFIG'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __package__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
\ No newline at end of file
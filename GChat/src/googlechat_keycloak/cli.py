@@ -3,17 +3,26 @@ Command Line Interface for Google Chat Keycloak Integration
 """
 
 import argparse
+import functools
+import logging
 import sys
 import json
 from typing import Optional
-from .auth import KeycloakWIFAuth
-from .client import GoogleChatClient, GoogleChatBot
 from .config import GOOGLE_CHAT_CONFIG
-from .setup import setup_main
+
+try:
+    import orjson
+    _dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    _dumps = lambda obj: json.dumps(obj, indent=2)
+
+logger = logging.getLogger("googlechat_keycloak")
 
 
 def cmd_setup(args):
     """Run setup process"""
+    from .setup import setup_main
+    
     print("🔧 Running setup...")
     success = setup_main()
     return 0 if success else 1
@@ -21,6 +30,8 @@ def cmd_setup(args):
 
 def cmd_test_auth(args):
     """Test authentication"""
+    from .auth import KeycloakWIFAuth
+    
     print("🔐 Testing authentications...")
     
 
@@ -51,28 +62,32 @@ def cmd_test_auth(args):
 
 def cmd_list_spaces(args):
     """List Google Chat spaces"""
+    from .client import GoogleChatClient
+    
     print("📋 Listing Google Chat spaces...")
     
     try:
         client = GoogleChatClient()
         spaces = client.list_spaces(page_size=args.limit)
+        items = spaces.get('spaces') or []
+        n = len(items)
         
-        if not spaces.get('spaces'):
+        if not n:
             print("No spaces found. Make sure the bot is added to at least one space.")
             return 1
         
-        print(f"Found {len(spaces['spaces'])} spaces:")
-        for i, space in enumerate(spaces['spaces'], 1):
+        print(f"Found {n} spaces:")
+        for i, space in enumerate(items):
             display_name = space.get('displayName', 'Unnamed Space')
             space_type = space.get('spaceType', 'Unknown')
             space_id = space.get('name')
             # Print only the short space id (strip the 'spaces/' prefix) so it's easy to copy for API calls
             short_id = space_id.split('/')[-1] if space_id else None
-            print(f"{i:2}. {display_name} ({space_type})")
+            print(f"{i+1:2}. {display_name} ({space_type})")
             print(f"     Resource id: {short_id}")
             if args.verbose:
                 # Verbose shows the full JSON for extra debugging
-                print(f"     Full object: {json.dumps(space, indent=2)}")
+                print(f"     Full object: {_dumps(space)}")
         
         return 0
         
@@ -93,6 +108,8 @@ def cmd_send_message(args):
     
     print(f"💬 Sending message to space...")
     
+    from .client import GoogleChatClient
+    
     try:
         client = GoogleChatClient()
         message = client.create_message(args.space_id, args.message)
@@ -116,6 +133,8 @@ def cmd_send_card(args):
     
     print(f"🎴 Sending notification card...")
     
+    from .client import GoogleChatBot
+    
     try:
         bot = GoogleChatBot("CLI Bot")
         card = bot.send_notification_card(
@@ -138,6 +157,9 @@ def cmd_send_card(args):
 
 def cmd_demo(args):
     """Run interactive demo"""
+    from .auth import KeycloakWIFAuth
+    from .client import GoogleChatClient, GoogleChatBot
+    
     print("🚀 Google Chat Keycloak Integration Demo")
     print("=" * 50)
     
@@ -157,25 +179,27 @@ def cmd_demo(args):
         print("\n2. Listing spaces...")
         client = GoogleChatClient()
         spaces = client.list_spaces(page_size=5)
+        items = spaces.get('spaces') or []
+        n = len(items)
         
-        if not spaces.get('spaces'):
+        if not n:
             print("❌ No spaces found. Add the bot to a space first.")
             return 1
         
-        print(f"✓ Found {len(spaces['spaces'])} spaces")
-        for i, space in enumerate(spaces['spaces'], 1):
+        print(f"✓ Found {n} spaces")
+        for i, space in enumerate(items):
             display_name = space.get('displayName', 'Unnamed Space')
             space_type = space.get('spaceType', 'Unknown')
             space_id = space.get('name')
             # Print only the short space id (strip the 'spaces/' prefix) so it's easy to copy for API calls
             short_id = space_id.split('/')[-1] if space_id else None
-            print(f"{i:2}. {display_name} ({space_type})")
+            print(f"{i+1:2}. {display_name} ({space_type})")
             print(f"     Resource id: {short_id}")
         
         
         # Show first space
-        #demo_space = spaces['spaces'][0]
-        demo_space = spaces['spaces'][1]
+        #demo_space = items[0]
+        demo_space = items[1]
         space_name = demo_space['name']
         space_display_name = demo_space.get('displayName', 'Unnamed Space')
         
@@ -226,15 +250,56 @@ def cmd_config(args):
     
     if args.verbose:
         print("\nFull Configuration:")
-        print("Keycloak:", json.dumps(KEYCLOAK_CONFIG, indent=2, default=str))
-        print("Google Cloud:", json.dumps(GOOGLE_CLOUD_CONFIG, indent=2, default=str))
-        print("Google Chat:", json.dumps(GOOGLE_CHAT_CONFIG, indent=2, default=str))
+        print("Keycloak:", json.dumps(dict(KEYCLOAK_CONFIG), indent=2, default=str))
+        print("Google Cloud:", json.dumps(dict(GOOGLE_CLOUD_CONFIG), indent=2, default=str))
+        print("Google Chat:", json.dumps(dict(GOOGLE_CHAT_CONFIG), indent=2, default=str))
     
     return 0
 
 
-def main():
-    """Main CLI entry point"""
+def _build_list_spaces_parser(parser):
+    parser.add_argument('--limit', type=int, default=10, help='Maximum number of spaces to list')
+
+
+def _build_send_message_parser(parser):
+    parser.add_argument('space_id', help='Space ID (get from list-spaces)')
+    parser.add_argument('message', help='Message text to send')
+
+
+def _build_send_card_parser(parser):
+    parser.add_argument('space_id', help='Space ID (get from list-spaces)')
+    parser.add_argument('--title', default='Notification', help='Card title')
+    parser.add_argument('--subtitle', default='Google Chat Bot', help='Card subtitle')
+    parser.add_argument('--message', default='Hello from CLI!', help='Card message')
+
+
+# command -> (help text, argument builder or None, handler)
+DISPATCH = {
+    'setup': ('Run setup process', None, cmd_setup),
+    'test-auth': ('Test authentication', None, cmd_test_auth),
+    'list-spaces': ('List Google Chat spaces', _build_list_spaces_parser, cmd_list_spaces),
+    'send-message': ('Send a message to a space', _build_send_message_parser, cmd_send_message),
+    'send-card': ('Send a notification card', _build_send_card_parser, cmd_send_card),
+    'demo': ('Run interactive demo', None, cmd_demo),
+    'config': ('Show configuration', None, cmd_config),
+}
+
+
+def _requested_command(argv):
+    """Return the subcommand named in argv, if any, without building the full parser"""
+    pre_parser = argparse.ArgumentParser(add_help=False)
+    pre_parser.add_argument('-v', '--verbose', action='store_true')
+    pre_parser.add_argument('command', nargs='?')
+    known, _ = pre_parser.parse_known_args(argv)
+    return known.command
+
+
+@functools.lru_cache(maxsize=len(DISPATCH) + 1)
+def _build_parser(command=None):
+    """
+    Build the CLI parser; only the requested subparser is added when the command is known.
+    Memoized so repeated main() calls in one process reuse the parser.
+    """
     parser = argparse.ArgumentParser(
         description="Google Chat API with Keycloak Workload Identity Federation",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -256,43 +321,33 @@ Examples:
     
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
     
-    # Setup command
-    setup_parser = subparsers.add_parser('setup', help='Run setup process')
-    setup_parser.set_defaults(func=cmd_setup)
-    
-    # Test auth command
-    auth_parser = subparsers.add_parser('test-auth', help='Test authentication')
-    auth_parser.set_defaults(func=cmd_test_auth)
-    
-    # List spaces command
-    spaces_parser = subparsers.add_parser('list-spaces', help='List Google Chat spaces')
-    spaces_parser.add_argument('--limit', type=int, default=10, help='Maximum number of spaces to list')
-    spaces_parser.set_defaults(func=cmd_list_spaces)
-    
-    # Send message command
-    msg_parser = subparsers.add_parser('send-message', help='Send a message to a space')
-    msg_parser.add_argument('space_id', help='Space ID (get from list-spaces)')
-    msg_parser.add_argument('message', help='Message text to send')
-    msg_parser.set_defaults(func=cmd_send_message)
+    names = [command] if command in DISPATCH else list(DISPATCH)
+    for name in names:
+        help_text, build_arguments, handler = DISPATCH[name]
+        subparser = subparsers.add_parser(name, help=help_text)
+        if build_arguments:
+            build_arguments(subparser)
+        subparser.set_defaults(func=handler)
     
-    # Send card command
-    card_parser = subparsers.add_parser('send-card', help='Send a notification card')
-    card_parser.add_argument('space_id', help='Space ID (get from list-spaces)')
-    card_parser.add_argument('--title', default='Notification', help='Card title')
-    card_parser.add_argument('--subtitle', default='Google Chat Bot', help='Card subtitle')
-    card_parser.add_argument('--message', default='Hello from CLI!', help='Card message')
-    card_parser.set_defaults(func=cmd_send_card)
-    
-    # Demo command
-    demo_parser = subparsers.add_parser('demo', help='Run interactive demo')
-    demo_parser.set_defaults(func=cmd_demo)
+    return parser
+
+
+def main(argv=None):
+    """Main CLI entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
     
-    # Config command
-    config_parser = subparsers.add_parser('config', help='Show configuration')
-    config_parser.set_defaults(func=cmd_config)
+    parser = _build_parser(_requested_command(argv))
     
     # Parse arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    
+    # Status/diagnostic detail goes to stderr via logging; command results stay on stdout
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(message)s',
+        stream=sys.stderr
+    )
     
     if not args.command:
         parser.print_help()
@@ -306,9 +361,7 @@ Examples:
         return 1
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-        if args.verbose:
-            import traceback
-            traceback.print_exc()
+        logger.debug("Unexpected error details", exc_info=True)
         return 1
 
 
@@ -5,10 +5,58 @@ Provides methods to interact with Google Chat API using Keycloak WIF authenticat
 
 import requests
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
-from .auth import KeycloakWIFAuth
-from .config import GOOGLE_CHAT_CONFIG
+import time
+import uuid
+import functools
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesParser
+from urllib.parse import urlsplit
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .auth import KeycloakWIFAuth, TOKEN_REFRESH_MARGIN
+from .config import CHAT_API_ENDPOINT, CHAT_USER_EMAIL
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    _dumps = lambda obj: json.dumps(obj).encode('utf-8')
+    _loads = json.loads
+
+BATCH_URL = "https://chat.googleapis.com/batch"
+BATCH_LIMIT = 100  # sub-requests per batch call
+BATCH_FALLBACK_WORKERS = 8
+_METHODS = frozenset({'GET', 'POST', 'PUT', 'DELETE'})
+_BODY_METHODS = frozenset({'POST', 'PUT'})
+MONITOR_POLL_INTERVAL = 5  # seconds between polls of an active space
+MONITOR_MAX_BACKOFF = 60
+MONITOR_MAX_CONCURRENT_POLLS = 5
+BROADCAST_MAX_IN_FLIGHT = 8  # stays well under the per-project Chat write quota
+BROADCAST_MAX_RETRIES = 5
+
+
+@functools.lru_cache(maxsize=512)
+def _normalize_space_cached(space_name: str) -> str:
+    """
+    Short space id for a space name; bots reuse a small set of spaces, so results are memoized
+    """
+    return space_name.rpartition('/')[2] or space_name
+
+
+class _RetryableStatus(Exception):
+    """
+    Raised inside the monitor loop for 429/5xx replies that should be retried with backoff
+    """
+    
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
 
 
 class GoogleChatClient:
@@ -16,11 +64,66 @@ class GoogleChatClient:
     Google Chat API client with Keycloak Workload Identity Federation authentication
     """
     
-    def __init__(self):
+    def __init__(self, http2: bool = False):
         self.auth = KeycloakWIFAuth()
-        self.base_url = GOOGLE_CHAT_CONFIG['api_endpoint']
-        self.user_email = GOOGLE_CHAT_CONFIG['user_email']
+        self.base_url = CHAT_API_ENDPOINT
+        self.user_email = CHAT_USER_EMAIL
         self._headers = None
+        self._token_expires_at = 0
+        self._auth_lock = threading.Lock()
+        self.http2 = http2
+        if http2:
+            self._init_httpx_session()
+        else:
+            self._init_requests_session()
+    
+    def _init_requests_session(self):
+        """
+        Dedicated keep-alive pool for Chat API calls; auth headers live on this session only.
+        Retry keeps urllib3's default idempotent methods so message POSTs are never replayed.
+        """
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+        )
+        self._session.mount('https://', adapter)
+        self._request = self._session.request
+        self._request_errors = (requests.exceptions.RequestException,)
+    
+    def _init_httpx_session(self):
+        """
+        HTTP/2 client: concurrent calls are multiplexed over one connection instead of
+        each holding a keep-alive socket. Requires httpx[http2].
+        """
+        import httpx
+        
+        transport = httpx.HTTPTransport(
+            http2=True,
+            retries=3,  # connection failures only; unlike urllib3 Retry, status codes are not retried
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
+        )
+        self._session = httpx.Client(transport=transport, timeout=httpx.Timeout(10.0))
+        session_request = self._session.request
+        
+        def request(method, url, params=None, data=None, headers=None):
+            return session_request(method, url, params=params, content=data, headers=headers)
+        
+        self._request = request
+        self._request_errors = (requests.exceptions.RequestException, httpx.HTTPError)
+    
+    def close(self):
+        """
+        Release pooled connections
+        """
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _normalize_space(self, space_name: str) -> Optional[str]:
         """
@@ -28,70 +131,77 @@ class GoogleChatClient:
         """
         if not space_name:
             return None
-        return space_name.split('/')[-1]
+        return _normalize_space_cached(space_name)
     
     def _get_headers(self):
         """
         Get authenticated headers for API requests
         """
-        if not self._headers:
-            access_token = self.auth.authenticate()
-            self._headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+        if not self._headers or time.time() >= self._token_expires_at - TOKEN_REFRESH_MARGIN:
+            with self._auth_lock:
+                # Another thread may have refreshed while we waited for the lock
+                if not self._headers or time.time() >= self._token_expires_at - TOKEN_REFRESH_MARGIN:
+                    self.auth.authenticate()
+                    self._set_token()
         return self._headers
     
     def _refresh_headers(self):
         """
         Refresh authentication headers
         """
-        self._headers = None
-        return self._get_headers()
+        with self._auth_lock:
+            # Drop the rejected token first so a failed re-auth never resends it
+            self._session.headers.pop('Authorization', None)
+            self._headers = None
+            self.auth.authenticate(force=True)
+            self._set_token()
+            return self._headers
+    
+    def _set_token(self):
+        """
+        Install headers for the current access token on the session and remember its expiry.
+        Requests never pass headers= themselves, so the session only changes once per token
+        """
+        headers = self.auth.headers()
+        if headers and headers is not self._headers:
+            self._session.headers['Authorization'] = headers['Authorization']
+            self._session.headers['Content-Type'] = headers['Content-Type']
+        self._headers = headers
+        self._token_expires_at = self.auth.token_expires_at or 0
     
     def _make_request(self, method: str, endpoint: str, data: Dict = None, params: Dict = None):
         """
         Make authenticated API request
         """
+        method = method.upper()
+        if method not in _METHODS:
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = self._get_headers()
+        body = None
+        if data is not None and method in _BODY_METHODS:
+            body = data if isinstance(data, bytes) else _dumps(data)
+        self._get_headers()
+        request = self._request
         
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, json=data, params=params)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=headers, json=data, params=params)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=headers, params=params)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Handle authentication errors by refreshing token
-            if response.status_code == 401:
-                print("Authentication token expired, refreshing...")
-                headers = self._refresh_headers()
+            for attempt in range(2):
+                response = request(method, url, params=params, data=body)
                 
-                # Retry the request with new token
-                if method.upper() == 'GET':
-                    response = requests.get(url, headers=headers, params=params)
-                elif method.upper() == 'POST':
-                    response = requests.post(url, headers=headers, json=data, params=params)
-                elif method.upper() == 'PUT':
-                    response = requests.put(url, headers=headers, json=data, params=params)
-                elif method.upper() == 'DELETE':
-                    response = requests.delete(url, headers=headers, params=params)
+                # Handle authentication errors by refreshing token and retrying once
+                if response.status_code != 401 or attempt:
+                    break
+                print("Authentication token expired, refreshing...")
+                self._refresh_headers()
             
             response.raise_for_status()
             
-            if response.content:
-                return response.json()
-            return {}
+            content = response.content
+            return _loads(content) if content else {}
             
-        except requests.exceptions.RequestException as e:
+        except self._request_errors as e:
             print(f"API request failed: {e}")
-            if hasattr(e, 'response') and e.response is not None:
+            if getattr(e, 'response', None) is not None:
                 print(f"Response: {e.response.text}")
             raise
     
@@ -118,12 +228,7 @@ class GoogleChatClient:
         message_data = {
             'text': text
         }
-        
-        params = {}
-        if thread_key:
-            params['threadKey'] = thread_key
-        space_name = self._normalize_space(space_name)
-        return self._make_request('POST', f'spaces/{space_name}/messages', data=message_data, params=params)
+        return self.post_message(space_name, message_data, thread_key)
     
     def create_card_message(self, space_name: str, card_data: Dict, thread_key: str = None) -> Dict:
         """
@@ -132,20 +237,30 @@ class GoogleChatClient:
         message_data = {
             'cardsV2': [card_data]
         }
-        
+        return self.post_message(space_name, message_data, thread_key)
+    
+    def post_message(self, space_name: str, message_data, thread_key: str = None) -> Dict:
+        """
+        Post a message body (dict, or JSON bytes already serialized) to a space
+        """
         params = {}
         if thread_key:
             params['threadKey'] = thread_key
         space_name = self._normalize_space(space_name)
         return self._make_request('POST', f'spaces/{space_name}/messages', data=message_data, params=params)
     
-    def list_messages(self, space_name: str, page_size: int = 25) -> Dict:
+    def list_messages(self, space_name: str, page_size: int = 25, filter: str = None,
+                      order_by: str = None) -> Dict:
         """
-        List messages in a space
+        List messages in a space, optionally filtered server-side (e.g. 'createTime > "..."')
         """
         params = {
             'pageSize': page_size
         }
+        if filter:
+            params['filter'] = filter
+        if order_by:
+            params['orderBy'] = order_by
         space_name = self._normalize_space(space_name)
         return self._make_request('GET', f'spaces/{space_name}/messages', params=params)
     
@@ -155,6 +270,83 @@ class GoogleChatClient:
         """
         return self._make_request('GET', f'messages/{message_name}')
     
+    def batch(self, requests_list: Iterable[Tuple]) -> Dict[str, Tuple[int, Dict]]:
+        """
+        Send several API calls in one multipart/mixed request to the batch endpoint.
+        Each entry is (method, endpoint) or (method, endpoint, data); results are keyed by
+        Content-ID ('item0', 'item1', ...) as (status_code, body).
+        """
+        self._get_headers()
+        
+        boundary = f"batch_{uuid.uuid4().hex}"
+        api_path = urlsplit(self.base_url).path.rstrip('/')
+        parts = []
+        for index, entry in enumerate(requests_list):
+            method, endpoint = entry[0].upper(), entry[1]
+            data = entry[2] if len(entry) > 2 else None
+            part = (
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <item{index}>\r\n\r\n"
+                f"{method} {api_path}/{endpoint.lstrip('/')} HTTP/1.1\r\n"
+            )
+            if data is not None:
+                part += f"Content-Type: application/json\r\n\r\n{_dumps(data).decode('utf-8')}\r\n"
+            else:
+                part += "\r\n"
+            parts.append(part)
+        body = "".join(parts) + f"--{boundary}--\r\n"
+        
+        response = self._request(
+            'POST',
+            BATCH_URL,
+            data=body.encode('utf-8'),
+            headers={'Content-Type': f'multipart/mixed; boundary={boundary}'}
+        )
+        response.raise_for_status()
+        return self._parse_batch_response(response)
+    
+    @staticmethod
+    def _parse_batch_response(response) -> Dict[str, Tuple[int, Dict]]:
+        """
+        Split a multipart/mixed batch reply into (status_code, body) per Content-ID
+        """
+        envelope = f"Content-Type: {response.headers['Content-Type']}\r\n\r\n".encode('utf-8')
+        message = BytesParser().parsebytes(envelope + response.content)
+        
+        results = {}
+        for part in message.get_payload():
+            content_id = (part.get('Content-ID') or '').strip('<>')
+            if content_id.startswith('response-'):
+                content_id = content_id[len('response-'):]
+            
+            http_reply = part.get_payload(decode=True) or b''
+            status_line, _, rest = http_reply.partition(b'\r\n')
+            _, _, payload = rest.partition(b'\r\n\r\n')
+            status_code = int(status_line.split()[1]) if status_line else 0
+            results[content_id] = (status_code, _loads(payload) if payload.strip() else {})
+        return results
+    
+    def get_messages_bulk(self, message_names: List[str]) -> List[Dict]:
+        """
+        Fetch many messages with one batch call per BATCH_LIMIT names.
+        Falls back to concurrent single GETs over the pooled session if the batch endpoint fails.
+        """
+        results = []
+        for start in range(0, len(message_names), BATCH_LIMIT):
+            chunk = message_names[start:start + BATCH_LIMIT]
+            try:
+                replies = self.batch([('GET', f'messages/{name}') for name in chunk])
+                results.extend(replies.get(f'item{i}', (0, {}))[1] for i in range(len(chunk)))
+            except self._request_errors as e:
+                # requests and httpx both carry the failed response on status errors
+                response = getattr(e, 'response', None)
+                if response is None or response.status_code < 500:
+                    raise
+                with ThreadPoolExecutor(max_workers=BATCH_FALLBACK_WORKERS) as executor:
+                    results.extend(executor.map(self.get_message, chunk))
+        return results
+    
     def update_message(self, message_name: str, text: str) -> Dict:
         """
         Update a message
@@ -226,14 +418,45 @@ class GoogleChatClient:
         return self._make_request('POST', f'spaces/{space_name}/webhooks', data=webhook_data)
 
 
+@functools.lru_cache(maxsize=1)
+def _shared_client() -> GoogleChatClient:
+    """
+    Process-wide client so bots created per request reuse one connection pool and token
+    """
+    return GoogleChatClient()
+
+
 class GoogleChatBot:
     """
     Higher-level bot interface for Google Chat
     """
     
-    def __init__(self, bot_name: str = "Keycloak Chat Bot"):
-        self.client = GoogleChatClient()
+    def __init__(self, bot_name: str = "Keycloak Chat Bot", client: GoogleChatClient = None):
+        self.client = client or _shared_client()
         self.bot_name = bot_name
+        
+        # Notification cards share one skeleton; only the header and text slots change per send
+        self._card_lock = threading.Lock()
+        self._card_header = {'title': '', 'subtitle': ''}
+        self._card_text = {'text': ''}
+        self._notification_card = {
+            'cardsV2': [
+                {
+                    'card': {
+                        'header': self._card_header,
+                        'sections': [
+                            {
+                                'widgets': [
+                                    {
+                                        'textParagraph': self._card_text
+                                    }
+                                ]
+                            }
+                        ]
+                    }
+                }
+            ]
+        }
     
     def send_simple_message(self, space_name: str, message: str) -> Dict:
         """
@@ -245,26 +468,86 @@ class GoogleChatBot:
         """
         Send a notification card
         """
-        card_data = {
-            'card': {
-                'header': {
-                    'title': title,
-                    'subtitle': subtitle
-                },
-                'sections': [
-                    {
-                        'widgets': [
-                            {
-                                'textParagraph': {
-                                    'text': message
-                                }
-                            }
-                        ]
-                    }
-                ]
-            }
-        }
-        return self.client.create_card_message(space_name, card_data)
+        # Serialize while holding the lock so concurrent sends never see each other's slots
+        with self._card_lock:
+            self._card_header['title'] = title
+            self._card_header['subtitle'] = subtitle
+            self._card_text['text'] = message
+            body = _dumps(self._notification_card)
+        return self.client.post_message(space_name, body)
+    
+    def broadcast(self, space_names: List[str], message: str,
+                  max_in_flight: int = BROADCAST_MAX_IN_FLIGHT) -> List[Tuple[str, object]]:
+        """
+        Send the same text message to several spaces concurrently.
+        Returns (space, result_or_exception) pairs in the order of space_names
+        """
+        # Authenticate once up front so worker threads don't race to fetch a token
+        self.client._get_headers()
+        
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = [executor.submit(self.send_simple_message, space_name, message)
+                       for space_name in space_names]
+        
+        results = []
+        for space_name, future in zip(space_names, futures):
+            error = future.exception()
+            results.append((space_name, error if error is not None else future.result()))
+        return results
+    
+    async def async_broadcast(self, space_names: List[str], message: str,
+                              max_in_flight: int = BROADCAST_MAX_IN_FLIGHT) -> List[Tuple[str, object]]:
+        """
+        Async variant of broadcast() on a single aiohttp session, backing off on HTTP 429
+        """
+        import aiohttp
+        
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.client._get_headers)
+        semaphore = asyncio.Semaphore(max_in_flight)
+        body = _dumps({'text': message})
+        connector = aiohttp.TCPConnector(limit=max_in_flight)
+        
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results = await asyncio.gather(*(
+                self._post_with_backoff(session, semaphore, space_name, body)
+                for space_name in space_names
+            ), return_exceptions=True)
+        return list(zip(space_names, results))
+    
+    async def _post_with_backoff(self, session, semaphore, space_name: str, body: bytes) -> Dict:
+        """
+        POST one message, honouring Retry-After on 429 and retrying 5xx with jittered backoff.
+        Every attempt carries the same requestId, so a retry after the server already accepted
+        the message returns that message instead of posting it twice
+        """
+        loop = asyncio.get_running_loop()
+        url = f"{self.client.base_url}/spaces/{self.client._normalize_space(space_name)}/messages"
+        params = {'requestId': str(uuid.uuid4())}
+        delay = 1.0
+        refreshed = False
+        
+        for attempt in range(BROADCAST_MAX_RETRIES):
+            headers = await loop.run_in_executor(None, self.client._get_headers)
+            async with semaphore:
+                async with session.post(url, data=body, headers=headers, params=params) as response:
+                    if response.status == 401 and not refreshed:
+                        await loop.run_in_executor(None, self.client._refresh_headers)
+                        refreshed = True
+                        continue
+                    if response.status != 429 and response.status < 500:
+                        response.raise_for_status()
+                        return _loads(await response.read() or b'{}')
+                    retry_after = response.headers.get('Retry-After')
+            
+            try:
+                wait = float(retry_after)
+            except (TypeError, ValueError):
+                wait = delay * random.uniform(0.8, 1.2)
+            delay = min(delay * 2, MONITOR_MAX_BACKOFF)
+            await asyncio.sleep(wait)
+        
+        raise _RetryableStatus(response.status)
     
     def send_interactive_card(self, space_name: str, title: str, buttons: List[Dict]) -> Dict:
         """
@@ -307,35 +590,82 @@ class GoogleChatBot:
         
         return self.client.create_card_message(space_name, card_data)
     
-    def monitor_space(self, space_name: str, callback_function):
+    def monitor_space(self, space_name: str, callback_function, stop_event=None):
+        """
+        Monitor a space for new messages until interrupted or stop_event is set.
+        Blocking wrapper around monitor_spaces(); for production, consider using webhooks instead
         """
-        Monitor a space for new messages (basic polling implementation)
-        For production, consider using webhooks instead
+        try:
+            asyncio.run(self.monitor_spaces([space_name], callback_function, stop_event))
+        except KeyboardInterrupt:
+            print("Monitoring stopped by user")
+    
+    async def monitor_spaces(self, space_names: List[str], callback_function, stop_event=None,
+                             max_concurrent_polls: int = MONITOR_MAX_CONCURRENT_POLLS):
         """
-        import time
+        Poll several spaces concurrently on one event loop, fetching only messages newer than
+        the last one seen in each space
+        """
+        import aiohttp
+        
+        stop_event = stop_event or asyncio.Event()
+        semaphore = asyncio.Semaphore(max_concurrent_polls)
+        connector = aiohttp.TCPConnector(limit=20, keepalive_timeout=75)
         
-        last_messages = set()
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(
+                self._poll_space(session, semaphore, stop_event, space_name, callback_function)
+                for space_name in space_names
+            ))
+    
+    async def _poll_space(self, session, semaphore, stop_event, space_name: str, callback_function):
+        """
+        Poll one space with a createTime watermark, backing off with jitter on 429/5xx
+        """
+        loop = asyncio.get_running_loop()
+        space_id = self.client._normalize_space(space_name)
+        url = f"{self.client.base_url}/spaces/{space_id}/messages"
+        watermark = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        backoff = MONITOR_POLL_INTERVAL
+        refreshed = False
         
-        while True:
+        while not stop_event.is_set():
+            # Token handling is synchronous; keep it off the event loop
+            headers = await loop.run_in_executor(None, self.client._get_headers)
+            params = {
+                'pageSize': 100,
+                'orderBy': 'createTime asc',
+                'filter': f'createTime > "{watermark}"'
+            }
+            
             try:
-                messages = self.client.list_messages(space_name)
-                current_messages = set()
+                async with semaphore:
+                    async with session.get(url, headers=headers, params=params) as response:
+                        if response.status == 401 and not refreshed:
+                            await loop.run_in_executor(None, self.client._refresh_headers)
+                            refreshed = True
+                            continue
+                        if response.status == 429 or response.status >= 500:
+                            raise _RetryableStatus(response.status)
+                        response.raise_for_status()
+                        data = await response.json()
                 
-                if 'messages' in messages:
-                    for message in messages['messages']:
-                        message_id = message.get('name', '')
-                        current_messages.add(message_id)
-                        
-                        if message_id not in last_messages:
-                            # New message found
-                            callback_function(message)
+                refreshed = False
+                delta = data.get('messages', [])
+                for message in delta:
+                    callback_function(message)
+                if delta:
+                    watermark = max(m.get('createTime', watermark) for m in delta)
+                backoff = MONITOR_POLL_INTERVAL
                 
-                last_messages = current_messages
-                time.sleep(5)  # Poll every 5 seconds
-                
-            except KeyboardInterrupt:
-                print("Monitoring stopped by user")
-                break
+            except _RetryableStatus as e:
+                backoff = min(backoff * 2, MONITOR_MAX_BACKOFF)
+                print(f"Error monitoring space: HTTP {e.status}, retrying in ~{backoff}s")
             except Exception as e:
+                backoff = min(backoff * 2, MONITOR_MAX_BACKOFF)
                 print(f"Error monitoring space: {e}")
-                time.sleep(10)  # Wait longer on error
\ No newline at end of file
+            
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=backoff * random.uniform(0.8, 1.2))
+            except asyncio.TimeoutError:
+                pass
\ No newline at end of file
@@ -2,8 +2,10 @@
 Configuration file for Google Chat API with Keycloak Workload Identity Federation
 """
 
+import types
+
 # Keycloak Configuration
-KEYCLOAK_CONFIG = {
+_KEYCLOAK_CONFIG = {
     "server_url": "https://keycloak.drapps.dev",  # Update with your actual Keycloak server URL
     "realm": "OrderMgmt",  # Update with your actual realm name
     "client_id": "Googlechat-api-client",
@@ -14,17 +16,17 @@ KEYCLOAK_CONFIG = {
 }
 
 # Google Cloud Project Configuration
-GOOGLE_CLOUD_CONFIG = {
+_GOOGLE_CLOUD_CONFIG = {
     "project_number": "2232356",  # Replace with your GCP project number
     "project_id": "OrderManagement",  # Replace with your GCP project ID
-    "service_account_email": 22-crane-475702-v6.iam.gserviceaccount.com",  # Update with actual SA email
+    "service_account_email": "22-crane-475702-v6.iam.gserviceaccount.com",  # Update with actual SA email
     "workload_identity_pool_id": "keycloak-pool",
     "workload_identity_provider_id": "keycloak",
     "location": "global"
 }
 
 # Google Chat API Configuration
-GOOGLE_CHAT_CONFIG = {
+_GOOGLE_CHAT_CONFIG = {
     "api_endpoint": "https://chat.googleapis.com/v1",
     "user_email": "2@drapps.dev@drapps.dev",
     "scopes": [
@@ -35,8 +37,8 @@ GOOGLE_CHAT_CONFIG = {
 }
 
 # Workload Identity Federation Configuration
-WIF_CONFIG = {
-    "audience": f"//iam.googleapis.com/projects/{GOOGLE_CLOUD_CONFIG['project_number']}/locations/{GOOGLE_CLOUD_CONFIG['location']}/workloadIdentityPools/{GOOGLE_CLOUD_CONFIG['workload_identity_pool_id']}/providers/{GOOGLE_CLOUD_CONFIG['workload_identity_provider_id']}",
+_WIF_CONFIG = {
+    "audience": f"//iam.googleapis.com/projects/{_GOOGLE_CLOUD_CONFIG['project_number']}/locations/{_GOOGLE_CLOUD_CONFIG['location']}/workloadIdentityPools/{_GOOGLE_CLOUD_CONFIG['workload_identity_pool_id']}/providers/{_GOOGLE_CLOUD_CONFIG['workload_identity_provider_id']}",
     "subject_token_type": "urn:ietf:params:oauth:token-type:id_token",  # Use ID token with openid scope
     "token_url": "https://sts.googleapis.com/v1/token"
 }
@@ -44,3 +46,21 @@ WIF_CONFIG = {
 # File paths
 WIF_CONFIG_FILE = "wif-config.json"
 CREDENTIALS_FILE = "credentials.json"
+
+# Read-only views of the configuration dicts
+KEYCLOAK_CONFIG = types.MappingProxyType(_KEYCLOAK_CONFIG)
+GOOGLE_CLOUD_CONFIG = types.MappingProxyType(_GOOGLE_CLOUD_CONFIG)
+GOOGLE_CHAT_CONFIG = types.MappingProxyType(_GOOGLE_CHAT_CONFIG)
+WIF_CONFIG = types.MappingProxyType(_WIF_CONFIG)
+
+# Values and URLs derived once at import for the request hot paths
+CHAT_API_ENDPOINT = _GOOGLE_CHAT_CONFIG['api_endpoint']
+CHAT_USER_EMAIL = _GOOGLE_CHAT_CONFIG['user_email']
+CHAT_SCOPES = tuple(_GOOGLE_CHAT_CONFIG['scopes'])
+CHAT_SPACES_URL = f"{CHAT_API_ENDPOINT}/spaces"
+CHAT_MESSAGES_URL_TMPL = CHAT_API_ENDPOINT + "/spaces/{}/messages"
+WIF_AUDIENCE = _WIF_CONFIG['audience']
+SERVICE_ACCOUNT_IMPERSONATION_URL = (
+    "https://iamcredentials.googleapis.com/v1/projects/-/serviceAccounts/"
+    f"{_GOOGLE_CLOUD_CONFIG['service_account_email']}:generateAccessToken"
+)
@@ -8,6 +8,25 @@ import sys
 from pathlib import Path
 from googlechat_keycloak.config import KEYCLOAK_CONFIG, GOOGLE_CLOUD_CONFIG, WIF_CONFIG, GOOGLE_CHAT_CONFIG
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def atomic_write_json(path, obj):
+    """
+    Write obj as indented JSON to a 0600 temp file, fsync it, then rename it over path
+    """
+    data = orjson.dumps(obj, option=orjson.OPT_INDENT_2) if orjson else json.dumps(obj, indent=2).encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 
 def generate_wif_config():
     """
@@ -33,8 +52,7 @@ def save_wif_config(filename="wif-config.json"):
     """
     config = generate_wif_config()
     
-    with open(filename, 'w') as f:
-        json.dump(config, f, indent=2)
+    atomic_write_json(filename, config)
     
     print(f"✓ WIF configuration saved to {filename}")
     return filename
@@ -3,9 +3,8 @@ Workload Identity Federation Configuration Generator
 This module creates the WIF configuration file needed for authentication
 """
 
-import json
-import os
 from config import KEYCLOAK_CONFIG, GOOGLE_CLOUD_CONFIG, WIF_CONFIG, GOOGLE_CHAT_CONFIG
+from googlechat_keycloak.setup import atomic_write_json
 
 
 def generate_wif_config():
@@ -47,8 +46,7 @@ def save_wif_config(filename="wif-config.json"):
     """
     config = generate_wif_config()
     
-    with open(filename, 'w') as f:
-        json.dump(config, f, indent=2)
+    atomic_write_json(filename, config)
     
     print(f"WIF configuration saved to {filename}")
     return filename
@@ -2,14 +2,136 @@
 Service for order requests operations - handles DocumentObjects and external API calls
 """
 
+import orjson
 import requests
 import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from urllib.parse import quote as _quote
+from concurrent.futures import Future
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Dict, Any, Optional
 from django.conf import settings
-from django.utils import timezone
+from attachments.metadata_cache import invalidate_document_metadata
+from attachments.request_context import now_iso, remaining_budget
 
 logger = logging.getLogger(__name__)
 
+# Retry policy for calls to the FastAPI order-request API
+RETRY_TOTAL = 4
+RETRY_BACKOFF_FACTOR = 0.25
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# POST (add document) is not retried: a 5xx or timeout after the server committed would append it twice
+RETRY_METHODS = frozenset({'GET', 'PUT', 'DELETE'})
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds, capped by the remaining request budget
+
+# Circuit breaker: stop calling the API after this many consecutive failures, retry after the timeout
+BREAKER_FAIL_MAX = 5
+BREAKER_RESET_TIMEOUT = 30  # seconds
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of calling the order-request API while its circuit is open"""
+
+
+class RequestBudgetExceeded(requests.exceptions.Timeout):
+    """Raised instead of calling the order-request API once the request's latency budget is spent"""
+
+
+# Headers sent with every call to the FastAPI order-request API
+DEFAULT_HEADERS = MappingProxyType({
+    'Content-Type': 'application/json',
+    'User-Agent': 'django_s3_app/1.0'
+})
+
+# Short-lived cache of GET /order-req/{id} results; views often fetch the same order back to back
+ORDER_CACHE_MAXSIZE = 4096
+ORDER_CACHE_TTL = 2.0  # seconds
+
+
+class _CircuitBreaker:
+    """
+    Circuit breaker for the order-request API calls.
+    Opens after fail_max consecutive failures (network errors or 5xx); once
+    reset_timeout has passed, a single trial call is let through and its
+    outcome closes or re-opens the circuit. State changes are logged.
+    """
+
+    def __init__(self, name: str, fail_max: int = BREAKER_FAIL_MAX, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+        raise CircuitOpenError(f"Circuit '{self.name}' is open - skipping call")
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that neither succeeded nor failed upstream (e.g. it was cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def _request_timeout():
+    """
+    (connect, read) timeout for the next call, each capped by what is left of the
+    current request's latency budget so retries never outlast the client's deadline
+    """
+    remaining = remaining_budget()
+    if remaining is None:
+        return REQUEST_TIMEOUT
+    if remaining <= 0:
+        raise RequestBudgetExceeded("Request latency budget exhausted - skipping call")
+    connect, read = REQUEST_TIMEOUT
+    return min(connect, remaining), min(read, remaining)
+
+
+@dataclass(slots=True)
 class DocumentObject:
     """
     Document object structure for embedding in OrderRequest.Documents[documents_object]
@@ -23,86 +145,86 @@ class DocumentObject:
         'failed'         # Upload failed
     ]
     
-    def __init__(self, **kwargs):
-        """Initialize document object with provided data"""
-        # Primary identifiers
-        self.s3_key = kwargs.get('s3_key', '')
-        
-        # File information
-        self.file_name = kwargs.get('file_name', '')
-        self.content_type = kwargs.get('content_type', '')
-        self.file_size = kwargs.get('file_size')
-        self.checksum = kwargs.get('checksum')
-        
-        # User information
-        self.user_email = kwargs.get('user_email', '')
-        
-        # Order request information
-        self.order_req_id = kwargs.get('order_req_id', '')
-        
-        # Optional metadata
-        self.label = kwargs.get('label')
-        self.notes = kwargs.get('notes')
-        
-        # S3 and upload information
-        self.bucket_name = kwargs.get('bucket_name', '')
-        self.sse_algorithm = kwargs.get('sse_algorithm', 'AES256')
-        self.upload_status = kwargs.get('upload_status', 'Awaiting')
-        
-        # URLs
-        self.presigned_upload_url = kwargs.get('presigned_upload_url')
-        self.public_url = kwargs.get('public_url')
-        self.public_url_expiry = kwargs.get('public_url_expiry')
-        
-        # Timestamps (as ISO strings for MongoDB)
-        self.created_at = kwargs.get('created_at', timezone.now().isoformat())
-        self.updated_at = kwargs.get('updated_at', timezone.now().isoformat())
-        self.uploaded_at = kwargs.get('uploaded_at')
+    # Primary identifiers
+    s3_key: str = ''
+    
+    # File information
+    file_name: str = ''
+    content_type: str = ''
+    file_size: Optional[int] = None
+    checksum: Optional[str] = None
+    
+    # User information
+    user_email: str = ''
+    
+    # Order request information
+    order_req_id: str = ''
     
-    def to_dict(self) -> dict:
-        """Convert document object to dictionary for MongoDB storage"""
-        return {
-            's3_key': self.s3_key,
-            'file_name': self.file_name,
-            'content_type': self.content_type,
-            'file_size': self.file_size,
-            'checksum': self.checksum,
-            'user_email': self.user_email,
-            'order_req_id': self.order_req_id,
-            'label': self.label,
-            'notes': self.notes,
-            'bucket_name': self.bucket_name,
-            'sse_algorithm': self.sse_algorithm,
-            'upload_status': self.upload_status,
-            'presigned_upload_url': self.presigned_upload_url,
-            'public_url': self.public_url,
-            'public_url_expiry': self.public_url_expiry,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at,
-            'uploaded_at': self.uploaded_at
-        }
+    # Optional metadata
+    label: Optional[str] = None
+    notes: Optional[str] = None
+    
+    # S3 and upload information
+    bucket_name: str = ''
+    sse_algorithm: str = 'AES256'
+    upload_status: str = 'Awaiting'
+    
+    # URLs
+    presigned_upload_url: Optional[str] = None
+    public_url: Optional[str] = None
+    public_url_expiry: Optional[str] = None
+    
+    # Timestamps (as ISO strings for MongoDB); missing ones default to the request time
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    uploaded_at: Optional[str] = None
+    
+    def __post_init__(self):
+        if self.created_at is None or self.updated_at is None:
+            now = now_iso()
+            if self.created_at is None:
+                self.created_at = now
+            if self.updated_at is None:
+                self.updated_at = now
     
     @classmethod
     def from_dict(cls, data: dict):
-        """Create DocumentObject from dictionary"""
-        return cls(**data)
+        """Create DocumentObject from dictionary, ignoring keys that are not document fields"""
+        return cls(**{key: value for key, value in data.items() if key in cls.__dataclass_fields__})
     
     def mark_upload_completed(self):
         """Mark the document as successfully uploaded"""
         self.upload_status = 'completed'
-        self.uploaded_at = timezone.now().isoformat()
-        self.updated_at = timezone.now().isoformat()
+        self.uploaded_at = self.updated_at = now_iso()
     
     def mark_upload_failed(self):
         """Mark the document upload as failed"""
         self.upload_status = 'failed'
-        self.updated_at = timezone.now().isoformat()
+        self.updated_at = now_iso()
     
     def is_upload_completed(self) -> bool:
         """Check if upload is completed"""
         return self.upload_status == 'completed'
     
 
+def _compile_to_dict(cls):
+    """
+    Generate cls.to_dict() as a single dict literal over the dataclass fields, so it
+    stays in sync with the field list without a per-call getattr loop like asdict()
+    """
+    items = ", ".join(f"{name!r}: self.{name}" for name in cls.__dataclass_fields__)
+    namespace = {}
+    exec(f"def to_dict(self):\n    return {{{items}}}\n", namespace)
+    to_dict = namespace['to_dict']
+    to_dict.__qualname__ = f"{cls.__name__}.to_dict"
+    to_dict.__doc__ = "Convert document object to dictionary for MongoDB storage"
+    cls.to_dict = to_dict
+    return cls
+
+
+_compile_to_dict(DocumentObject)
+
+
 class OrderRequestsService:
     """
     Service for order requests operations via external API
@@ -111,7 +233,80 @@ class OrderRequestsService:
     
     def __init__(self):
         self.api_base_url = getattr(settings, 'FASTAPI_APP_BASE_URL', '')
+        self._base = f"{self.api_base_url}/api/v1/order-req"
+        
+        # Pooled keep-alive session so repeated calls to the FastAPI host skip TCP/TLS setup
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF_FACTOR,
+                status_forcelist=RETRY_STATUS_CODES,
+                allowed_methods=RETRY_METHODS,
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        
+        self.breaker = _CircuitBreaker('fastapi-order-req')
         
+        self._order_cache = TTLCache(maxsize=ORDER_CACHE_MAXSIZE, ttl=ORDER_CACHE_TTL)
+        # s3_key -> document index per cached order, tied to the exact order_data it was built from
+        self._document_index_cache = TTLCache(maxsize=ORDER_CACHE_MAXSIZE, ttl=ORDER_CACHE_TTL)
+        self._order_cache_lock = threading.Lock()
+        self._order_writes = 0
+        
+        # In-flight GETs keyed by order_req_id; concurrent callers wait on the same fetch
+        self._inflight: Dict[str, Future] = {}
+    
+    def _get_cached_order(self, order_req_id: str) -> Optional[Dict[str, Any]]:
+        """Return a recently fetched order request, or None on a miss"""
+        with self._order_cache_lock:
+            return self._order_cache.get(order_req_id)
+    
+    def _cache_order(self, order_req_id: str, order_data: Dict[str, Any], writes_seen: int):
+        """
+        Remember a fetched order request for ORDER_CACHE_TTL seconds, unless this
+        service wrote to an order while the GET was in flight
+        """
+        with self._order_cache_lock:
+            if self._order_writes == writes_seen:
+                self._order_cache[order_req_id] = order_data
+    
+    def invalidate_order(self, order_req_id: str):
+        """Drop a cached order request so the next read sees this service's own writes"""
+        with self._order_cache_lock:
+            self._order_writes += 1
+            self._order_cache.pop(order_req_id, None)
+            self._document_index_cache.pop(order_req_id, None)
+    
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send one request on the pooled session through the circuit breaker.
+        Raises CircuitOpenError (a requests ConnectionError) while the circuit is open
+        and RequestBudgetExceeded (a requests Timeout) once the request budget is spent.
+        """
+        timeout = _request_timeout()
+        self.breaker.before_call()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+    
     def get_order_request(self, order_req_id: str) -> Optional[Dict[str, Any]]:
         """
         GET order request from external API
@@ -125,19 +320,44 @@ class OrderRequestsService:
         if not self.api_base_url:
             logger.warning("FastAPI base URL not configured")
             return None
-            
+        
+        cached = self._get_cached_order(order_req_id)
+        if cached is not None:
+            return cached
+        
+        with self._order_cache_lock:
+            future = self._inflight.get(order_req_id)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[order_req_id] = future
+        
+        if not is_leader:
+            return future.result()
+        
         try:
-            url = f"{self.api_base_url}/api/v1/order-req/{order_req_id}"
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'django_s3_app/1.0'
-            }
+            order_data = self._fetch_order_request(order_req_id)
+            future.set_result(order_data)
+            return order_data
+        finally:
+            with self._order_cache_lock:
+                self._inflight.pop(order_req_id, None)
+            if not future.done():
+                future.set_result(None)
+    
+    def _fetch_order_request(self, order_req_id: str) -> Optional[Dict[str, Any]]:
+        """Single GET of an order request; callers go through get_order_request()"""
+        writes_seen = self._order_writes
+        try:
+            url = f"{self._base}/{order_req_id}"
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._send('GET', url)
             
             if response.status_code == 200:
                 logger.info(f"Successfully retrieved order request: {order_req_id}")
-                return response.json()
+                order_data = response.json()
+                self._cache_order(order_req_id, order_data, writes_seen)
+                return order_data
             elif response.status_code == 404:
                 logger.warning(f"Order request not found: {order_req_id}")
                 return None
@@ -166,21 +386,17 @@ class OrderRequestsService:
 
             
         try:
-            url = f"{self.api_base_url}/api/v1/order-req/{order_req_id}"
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'django_s3_app/1.0'
-            }
-            
-            # Convert DocumentObjects to dictionaries
-            documents_data = [doc.to_dict() for doc in documents]
+            url = f"{self._base}/{order_req_id}"
             
-            payload = {
-                'documents': documents_data,
-                'updated_at': timezone.now().isoformat()
-            }
+            # orjson encodes the DocumentObject dataclasses natively, no per-document dict copies
+            body = orjson.dumps({
+                'documents': documents,
+                'updated_at': now_iso()
+            })
             
-            response = requests.put(url, json=payload, headers=headers, timeout=30)
+            response = self._send('PUT', url, data=body)
+            self.invalidate_order(order_req_id)
+            invalidate_document_metadata(*(document.s3_key for document in documents))
             
             if response.status_code in [200, 204]:
                 logger.info(f"Successfully updated order request documents: {order_req_id}")
@@ -213,16 +429,14 @@ class OrderRequestsService:
             return False
 
         try:
-            url = f"{self.api_base_url}/api/v1/order-req/{order_req_id}/Doc"
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'django_s3_app/1.0'
-            }
+            url = f"{self._base}/{order_req_id}/Doc"
 
-            # Send document data
-            payload = document.to_dict()
+            # Send document data, encoded straight from the dataclass
+            body = orjson.dumps(document)
 
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self._send('POST', url, data=body)
+            self.invalidate_order(order_req_id)
+            invalidate_document_metadata(document.s3_key)
 
             if response.status_code in [200, 201]:
                 logger.info(f"Successfully added document to order: {order_req_id}")
@@ -246,34 +460,68 @@ class OrderRequestsService:
         logger.warning("add_document_to_order() is deprecated, use add_single_document_to_order()")
         return self.add_single_document_to_order(order_req_id, document)
     
-    def remove_document_from_order(self, order_req_id: str, s3_key: str) -> bool:
+    def remove_document_from_order(self, order_req_id: str, s3_key: str,
+                                   deleted_by: str = 'django_s3_app') -> bool:
         """
         Remove a document from an order request by s3_key
         
         Args:
             order_req_id: Order request ID
             s3_key: S3 key of document to remove
+            deleted_by: Email of the user performing the deletion
             
         Returns:
             True if successful, False otherwise
         """
-        # Get current order request
-        order_data = self.get_order_request(order_req_id)
-        if not order_data:
-            logger.error(f"Cannot remove document - order request not found: {order_req_id}")
-            return False
-        
-        # Get existing documents and filter out the one to remove
-        existing_documents = order_data.get('documents', [])
-        filtered_documents = [
-            DocumentObject.from_dict(doc) 
-            for doc in existing_documents 
-            if doc.get('s3_key') != s3_key
-        ]
-        
-        # Update the order request
-        return self.update_order_request_documents(order_req_id, filtered_documents)
+        return self.delete_document_from_order(order_req_id, s3_key, deleted_by)
     
+    def delete_document_from_order(self, order_req_id: str, s3_key: str, deleted_by: str) -> bool:
+        """
+        DELETE a document from order request in one round trip (soft delete on the API side)
+        Endpoint: DELETE /api/v1/order-req/{order_req_id}/Doc/{s3_key}?deleted_by=...
+
+        Args:
+            order_req_id: Order request ID
+            s3_key: Document S3 key
+            deleted_by: Email of the user performing the deletion
+
+        Returns:
+            True if the document is deleted (including already deleted), False otherwise
+        """
+        if not self.api_base_url:
+            logger.warning("FastAPI base URL not configured")
+            return False
+
+        try:
+            encoded_s3_key = _quote(s3_key, safe='')
+
+            url = f"{self._base}/{order_req_id}/Doc/{encoded_s3_key}"
+
+            response = self._send('DELETE', url, params={'deleted_by': deleted_by})
+            self.invalidate_order(order_req_id)
+            invalidate_document_metadata(s3_key)
+
+            if response.status_code in [200, 204]:
+                logger.info(f"Successfully deleted document from order: {s3_key}")
+                return True
+            elif response.status_code == 409:
+                # Already soft-deleted, e.g. by an earlier attempt of this (retried) DELETE
+                logger.info(f"Document already deleted from order: {s3_key}")
+                return True
+            elif response.status_code == 404:
+                logger.warning(f"Document or order request not found: {order_req_id}/{s3_key}")
+                return False
+            else:
+                logger.error(f"Failed to delete document: {response.status_code} - {response.text}")
+                return False
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error deleting document: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error deleting document: {e}")
+            return False
+
     def get_document_from_order(self, order_req_id: str, s3_key: str) -> Optional[DocumentObject]:
         """
         Get a specific document from an order request
@@ -285,18 +533,38 @@ class OrderRequestsService:
         Returns:
             DocumentObject if found, None otherwise
         """
+        document_index = self._get_document_index(order_req_id)
+        if not document_index:
+            return None
+        
+        doc_data = document_index.get(s3_key)
+        return DocumentObject.from_dict(doc_data) if doc_data is not None else None
+
+    def _get_document_index(self, order_req_id: str) -> Optional[Dict[str, dict]]:
+        """
+        Map s3_key -> document dict for an order request, built once per fetched order
+        and reused while that fetch stays cached
+        """
         order_data = self.get_order_request(order_req_id)
         if not order_data:
             return None
-        
-        documents = order_data.get('documents', [])
-        for doc_data in documents:
-            if doc_data.get('s3_key') == s3_key:
-                return DocumentObject.from_dict(doc_data)
 
-        return None
+        with self._order_cache_lock:
+            entry = self._document_index_cache.get(order_req_id)
+        if entry is not None and entry[0] is order_data:
+            return entry[1]
+
+        document_index = {}
+        for doc_data in order_data.get('documents', []):
+            # First occurrence wins, as with the previous linear scan
+            document_index.setdefault(doc_data.get('s3_key'), doc_data)
 
-    def update_document_status_in_order(self, order_req_id: str, s3_key: str, status: str) -> bool:
+        with self._order_cache_lock:
+            self._document_index_cache[order_req_id] = (order_data, document_index)
+        return document_index
+
+    def update_document_status_in_order(self, order_req_id: str, s3_key: str, status: str,
+                                        document: Optional[DocumentObject] = None) -> bool:
         """
         PUT document status update to order request (new MongoDB API endpoint)
         Endpoint: PUT /api/v1/order-req/{order_req_id}/Doc/{s3_key}
@@ -305,6 +573,8 @@ class OrderRequestsService:
             order_req_id: Order request ID
             s3_key: Document S3 key
             status: New upload status ('pending', 'uploading', 'completed', 'failed')
+            document: Optional DocumentObject to register with this status if the order
+                      request does not hold the document yet (e.g. its background add failed)
 
         Returns:
             True if successful, False otherwise
@@ -315,28 +585,28 @@ class OrderRequestsService:
 
         try:
             # URL encode the s3_key for the path parameter
-            import urllib.parse
-            encoded_s3_key = urllib.parse.quote(s3_key, safe='')
+            encoded_s3_key = _quote(s3_key, safe='')
 
-            url = f"{self.api_base_url}/api/v1/order-req/{order_req_id}/Doc/{encoded_s3_key}"
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'django_s3_app/1.0'
-            }
+            url = f"{self._base}/{order_req_id}/Doc/{encoded_s3_key}"
 
+            now = now_iso()
             payload = {
                 'upload_status': status,
-                'updated_at': timezone.now().isoformat()
+                'updated_at': now
             }
 
             if status == 'completed':
-                payload['uploaded_at'] = timezone.now().isoformat()
+                payload['uploaded_at'] = now
 
-            response = requests.put(url, json=payload, headers=headers, timeout=30)
+            response = self._send('PUT', url, json=payload)
+            self.invalidate_order(order_req_id)
+            invalidate_document_metadata(s3_key)
 
             if response.status_code in [200, 204]:
                 logger.info(f"Successfully updated document status: {s3_key} -> {status}")
                 return True
+            elif response.status_code == 404 and document is not None:
+                return self._register_with_status(order_req_id, document, status)
             else:
                 logger.error(f"Failed to update status: {response.status_code} - {response.text}")
                 return False
@@ -348,5 +618,68 @@ class OrderRequestsService:
             logger.error(f"Unexpected error updating status: {e}")
             return False
 
+    def _register_with_status(self, order_req_id: str, document: DocumentObject, status: str) -> bool:
+        """Add a document the order request does not hold yet, already carrying its new status"""
+        logger.warning(f"Document not registered with order request, adding it: {order_req_id}/{document.s3_key}")
+        document.upload_status = status
+        document.updated_at = now_iso()
+        if status == 'completed':
+            document.uploaded_at = document.updated_at
+        return self.add_single_document_to_order(order_req_id, document)
+
+    def update_document_statuses_bulk(self, order_req_id: str, updates: List[Dict[str, str]],
+                                      documents: Optional[Dict[str, DocumentObject]] = None) -> bool:
+        """
+        PUT several document status updates to order request in one call
+        Endpoint: PUT /api/v1/order-req/{order_req_id}/Doc/bulk-status
+
+        Args:
+            order_req_id: Order request ID
+            updates: List of {'s3_key': ..., 'upload_status': ...} dicts
+            documents: Optional s3_key -> DocumentObject map; documents the order request
+                       does not hold yet are registered with their new status
+
+        Returns:
+            True if every document was updated (or registered), False otherwise
+        """
+        if not self.api_base_url:
+            logger.warning("FastAPI base URL not configured")
+            return False
+
+        try:
+            url = f"{self._base}/{order_req_id}/Doc/bulk-status"
+
+            response = self._send('PUT', url, json=updates)
+            self.invalidate_order(order_req_id)
+            invalidate_document_metadata(*(update['s3_key'] for update in updates))
+
+            if response.status_code != 200:
+                logger.error(f"Failed to update statuses: {response.status_code} - {response.text}")
+                return False
+
+            result = response.json()
+            logger.info(f"Successfully updated {len(result.get('updated', []))} document statuses: {order_req_id}")
+            success = not result.get('deleted')
+            if not success:
+                logger.error(f"Cannot update deleted documents: {order_req_id} {result['deleted']}")
+
+            latest_status = {update['s3_key']: update['upload_status'] for update in updates}
+            for s3_key in result.get('not_found', []):
+                document = (documents or {}).get(s3_key)
+                if document is None:
+                    logger.error(f"Document not found in order request: {order_req_id}/{s3_key}")
+                    success = False
+                    continue
+                success = self._register_with_status(order_req_id, document, latest_status[s3_key]) and success
+            return success
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Network error updating statuses: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error updating statuses: {e}")
+            return False
+
+
 # Global instance
-order_requests_service = OrderRequestsService()
\ No newline at end of file
+order_requests_service = OrderRequestsService()
@@ -6,17 +6,33 @@ Handles document metadata, S3 operations, and FastAPI integration
 import logging
 import requests
 import hashlib
+import threading
+import time
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any
-from django.utils import timezone
 from s3_service.service import s3_service
 from keycloak_auth.service import keycloak_service
 from django.conf import settings
 from .models import DocumentMetadata
+from .request_context import now_iso
 from .dbHandling.order_requests_service import order_requests_service, DocumentObject
 
 logger = logging.getLogger(__name__)
 
+# Background workers for registering new documents with the order request API; the presigned
+# URL is valid on its own, so the HTTP response does not wait for that call. A document that is
+# still unregistered when the client reports its upload status is registered by that update
+ORDER_SYNC_WORKERS = 4
+ORDER_SYNC_ATTEMPTS = 3
+ORDER_SYNC_RETRY_DELAY = 1.0  # seconds, doubled after each failed attempt
+
+# Public URLs are reused for the same (s3_key, expiry) for at most this many seconds, so a
+# reused URL keeps nearly all of the lifetime the caller asked for
+PUBLIC_URL_CACHE_TTL = 300
+PUBLIC_URL_CACHE_MAXSIZE = 4096
+
 class DocumentHandler:
     """
     Service class for handling document operations including:
@@ -26,7 +42,13 @@ class DocumentHandler:
     """
     
     def __init__(self):
-        pass
+        self._order_sync_executor = ThreadPoolExecutor(
+            max_workers=ORDER_SYNC_WORKERS,
+            thread_name_prefix='order-doc-sync'
+        )
+        # s3_key -> (expiry_seconds, public_url, reuse_until)
+        self._public_urls = TTLCache(maxsize=PUBLIC_URL_CACHE_MAXSIZE, ttl=PUBLIC_URL_CACHE_TTL)
+        self._public_urls_lock = threading.Lock()
     
     def create_presigned_upload_url(
         self,
@@ -56,67 +78,29 @@ class DocumentHandler:
             Tuple of (presigned_url, metadata_dict)
         """
         try:
-            # Generate presigned URL and S3 key
-            # Prepare extra metadata to store on S3 object (x-amz-meta-*)
-            extra_metadata = {
-                'user_email': user_email or 'anonymous',
-                'label': label,
-                'notes': notes
-            }
-
-            # Only add order_req_id to metadata if provided
-            if order_req_id:
-                extra_metadata['order_req_id'] = order_req_id
-
-            presigned_url, s3_key, s3_metadata = s3_service.generate_presigned_upload_url(
-                file_name=file_name,
-                content_type=content_type,
-                file_size=file_size,
-                user_email=user_email,
-                extra_metadata=extra_metadata
+            presigned_url, s3_key, s3_metadata = self._generate_presigned_url(
+                file_name, content_type, order_req_id, file_size, user_email, label, notes
             )
 
-            # Add document to existing order request via external API (only if order_req_id provided)
+            # Register document with the order request in the background (only if order_req_id provided)
             if order_req_id:
-                # Create DocumentObject for the order request
-                document_object = DocumentObject(
-                    s3_key=s3_key,
-                    file_name=file_name,
-                    content_type=content_type,
-                    file_size=file_size,
-                    checksum=checksum,
-                    user_email=user_email or 'anonymous',
-                    order_req_id=order_req_id,
-                    label=label,
-                    notes=notes,
-                    bucket_name=s3_metadata.get('bucket_name'),
-                    sse_algorithm=s3_metadata.get('sse_algorithm'),
-                    upload_status='Awaiting',
-                    presigned_upload_url=presigned_url
+                document_object = self._build_document_object(
+                    presigned_url, s3_key, s3_metadata, file_name, content_type,
+                    order_req_id, file_size, user_email, label, notes, checksum
+                )
+                future = self._order_sync_executor.submit(
+                    self._register_document, order_req_id, document_object
+                )
+                future.add_done_callback(
+                    lambda f: self._log_order_sync_result(f, order_req_id, s3_key)
                 )
-
-                success = order_requests_service.add_document_to_order(order_req_id, document_object)
-                if not success:
-                    logger.warning(f"Failed to add document to order request: {order_req_id}")
             else:
                 logger.info(f"No order_req_id provided - document will be stored under user folder: {user_email}")
 
-            # Prepare response metadata (no local database persistence)
-            response_metadata = {
-                'document_id': None,  # No local database ID
-                's3_key': s3_key,
-                'file_name': file_name,
-                'content_type': content_type,
-                'file_size': file_size,
-                'checksum': checksum,
-                'user_email': user_email,
-                'label': label,
-                'notes': notes,
-                'order_req_id': order_req_id,
-                'upload_fields': s3_metadata.get('fields'),
-                'upload_expiry': s3_metadata.get('upload_expiry'),
-                'created_at': timezone.now().isoformat()
-            }
+            response_metadata = self._response_metadata(
+                s3_key, s3_metadata, file_name, content_type,
+                order_req_id, file_size, user_email, label, notes, checksum
+            )
 
             logger.info(f"Created presigned upload URL for document: {file_name}")
             return presigned_url, response_metadata
@@ -124,6 +108,129 @@ class DocumentHandler:
         except Exception as e:
             logger.error(f"Failed to create presigned upload URL: {e}")
             raise
+
+    def create_presigned_upload_urls(
+        self,
+        files: List[Dict[str, Any]],
+        user_email: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Create presigned upload URLs for several files in one call.
+        Presigning is local signing with no network I/O, so a batch costs one
+        authenticated request instead of one per file.
+
+        Args:
+            files: Validated upload requests (file_name, content_type, order_req_id, ...)
+            user_email: User email address
+
+        Returns:
+            List of (presigned_url, metadata_dict) in the order of files
+        """
+        return [
+            self.create_presigned_upload_url(
+                file_name=item['file_name'],
+                content_type=item['content_type'],
+                order_req_id=item.get('order_req_id'),
+                file_size=item.get('file_size'),
+                user_email=user_email,
+                label=item.get('label'),
+                notes=item.get('notes'),
+                checksum=item.get('checksum')
+            )
+            for item in files
+        ]
+
+    def _register_document(self, order_req_id: str, document_object: DocumentObject) -> bool:
+        """
+        Add a new document to its order request, retrying with backoff (the order API skips
+        an s3_key the order already holds, so re-adding it is safe)
+        """
+        delay = ORDER_SYNC_RETRY_DELAY
+        for attempt in range(1, ORDER_SYNC_ATTEMPTS + 1):
+            if order_requests_service.add_single_document_to_order(order_req_id, document_object):
+                return True
+            if attempt < ORDER_SYNC_ATTEMPTS:
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+    def _log_order_sync_result(self, future, order_req_id, s3_key):
+        """
+        Done-callback for background document registration. A failure leaves an S3 upload
+        slot with no order record until the client's status update registers it
+        (UpdateOrderDocumentsView); it is logged with its s3_key for reconciliation.
+        """
+        if future.cancelled():
+            error = 'cancelled'
+        elif future.exception() is not None:
+            error = future.exception()
+        elif future.result():
+            return
+        else:
+            error = 'API returned failure'
+        logger.warning(
+            f"Failed to add document to order request: {order_req_id} "
+            f"(orphan document s3_key={s3_key}): {error}"
+        )
+
+    def _generate_presigned_url(self, file_name, content_type, order_req_id, file_size, user_email, label, notes):
+        """Presign the S3 upload; returns (presigned_url, s3_key, s3_metadata)"""
+        # Prepare extra metadata to store on S3 object (x-amz-meta-*)
+        extra_metadata = {
+            'user_email': user_email or 'anonymous',
+            'label': label,
+            'notes': notes
+        }
+
+        # Only add order_req_id to metadata if provided
+        if order_req_id:
+            extra_metadata['order_req_id'] = order_req_id
+
+        return s3_service.generate_presigned_upload_url(
+            file_name=file_name,
+            content_type=content_type,
+            file_size=file_size,
+            user_email=user_email,
+            extra_metadata=extra_metadata
+        )
+
+    def _build_document_object(self, presigned_url, s3_key, s3_metadata, file_name, content_type,
+                               order_req_id, file_size, user_email, label, notes, checksum) -> DocumentObject:
+        """Create DocumentObject for the order request"""
+        return DocumentObject(
+            s3_key=s3_key,
+            file_name=file_name,
+            content_type=content_type,
+            file_size=file_size,
+            checksum=checksum,
+            user_email=user_email or 'anonymous',
+            order_req_id=order_req_id,
+            label=label,
+            notes=notes,
+            bucket_name=s3_metadata.get('bucket_name'),
+            sse_algorithm=s3_metadata.get('sse_algorithm'),
+            upload_status='Awaiting',
+            presigned_upload_url=presigned_url
+        )
+
+    def _response_metadata(self, s3_key, s3_metadata, file_name, content_type,
+                           order_req_id, file_size, user_email, label, notes, checksum) -> Dict[str, Any]:
+        """Prepare response metadata (no local database persistence)"""
+        return {
+            'document_id': None,  # No local database ID
+            's3_key': s3_key,
+            'file_name': file_name,
+            'content_type': content_type,
+            'file_size': file_size,
+            'checksum': checksum,
+            'user_email': user_email,
+            'label': label,
+            'notes': notes,
+            'order_req_id': order_req_id,
+            'upload_fields': s3_metadata.get('fields'),
+            'upload_expiry': s3_metadata.get('upload_expiry'),
+            'created_at': now_iso()
+        }
     
     def generate_public_url(
         self,
@@ -143,6 +250,12 @@ class DocumentHandler:
             Public URL string or None if not found
         """
         try:
+            expiry = expiry_seconds or s3_service.public_url_expiry
+            with self._public_urls_lock:
+                cached = self._public_urls.get(s3_key)
+            if cached and cached[0] == expiry and cached[2] > time.monotonic():
+                return cached[1]
+
             # Verify document exists in S3
             s3_metadata = s3_service.get_object_metadata(s3_key)
             if not s3_metadata:
@@ -150,9 +263,14 @@ class DocumentHandler:
                 return None
 
             # Generate public URL
-            public_url = s3_service.generate_public_url(s3_key, expiry_seconds)
+            public_url = s3_service.generate_public_url(s3_key, expiry)
 
-            file_name = s3_metadata.get('metadata', {}).get('file_name', s3_key.split('/')[-1])
+            reuse_for = min(expiry - 60, PUBLIC_URL_CACHE_TTL)
+            if reuse_for > 0:
+                with self._public_urls_lock:
+                    self._public_urls[s3_key] = (expiry, public_url, time.monotonic() + reuse_for)
+
+            file_name = (s3_metadata.get('metadata') or {}).get('file_name', s3_key.rpartition('/')[2])
             logger.info(f"Generated public URL for document: {file_name}")
             return public_url
 
@@ -160,5 +278,10 @@ class DocumentHandler:
             logger.error(f"Failed to generate public URL: {e}")
             raise
 
+    def invalidate_public_url(self, s3_key: str):
+        """Forget the reusable public URL for a key that was moved or deleted"""
+        with self._public_urls_lock:
+            self._public_urls.pop(s3_key, None)
+
 # Global document handler instance
 document_handler = DocumentHandler()
\ No newline at end of file
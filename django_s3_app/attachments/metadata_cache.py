@@ -0,0 +1,26 @@
+"""
+Cache of assembled document metadata (S3 + MongoDB) served by DocumentMetadataView
+"""
+
+import logging
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Entries are also checked against the S3 ETag on every read; the TTL bounds staleness of the
+# MongoDB fields for writes this app never sees (other services, direct API calls)
+DOCUMENT_METADATA_CACHE_TTL = 300  # 5 minutes
+
+
+def document_metadata_cache_key(s3_key: str) -> str:
+    return f"docmeta:v3:{s3_key}"
+
+
+def invalidate_document_metadata(*s3_keys: str):
+    """Drop cached metadata for documents whose S3 object or MongoDB record changed"""
+    if not s3_keys:
+        return
+    try:
+        cache.delete_many([document_metadata_cache_key(s3_key) for s3_key in s3_keys])
+    except Exception as e:
+        logger.warning(f"Failed to invalidate document metadata cache: {e}")
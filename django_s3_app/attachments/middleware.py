@@ -0,0 +1,44 @@
+"""
+Middleware for attachment request context
+"""
+
+import logging
+import time
+from django.conf import settings
+from .request_context import begin_request, end_request
+
+logger = logging.getLogger(__name__)
+
+
+class RequestContextMiddleware:
+    """
+    Captures per-request values (the request timestamp and latency budget) in
+    context variables so services can reuse them instead of recomputing them on
+    every call.
+    
+    The budget comes from settings.REQUEST_BUDGET_S, shortened by an
+    X-Request-Deadline header (absolute Unix time in seconds) sent by the client.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = begin_request(self._budget(request))
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
+
+    @staticmethod
+    def _budget(request):
+        budget = getattr(settings, 'REQUEST_BUDGET_S', None)
+        header = request.META.get('HTTP_X_REQUEST_DEADLINE')
+        if header:
+            try:
+                client_budget = float(header) - time.time()
+            except ValueError:
+                logger.warning(f"Ignoring invalid X-Request-Deadline header: {header!r}")
+            else:
+                budget = client_budget if budget is None else min(budget, client_budget)
+        return budget
@@ -0,0 +1,43 @@
+"""
+Per-request context values shared by the attachment services
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+from django.utils import timezone
+
+# ISO timestamp captured once when the request started (set by RequestContextMiddleware)
+_request_now: ContextVar[Optional[str]] = ContextVar('request_now', default=None)
+# time.monotonic() value by which the request should have answered (None = no budget)
+_request_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+
+def now_iso() -> str:
+    """Timestamp of the current request, or the live time outside a request (background work)"""
+    value = _request_now.get()
+    return value if value is not None else timezone.now().isoformat()
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None outside a request"""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def begin_request(budget: Optional[float] = None):
+    """
+    Capture the request timestamp and, when a budget in seconds is given, the
+    request deadline; returns a token for end_request()
+    """
+    deadline = time.monotonic() + budget if budget is not None else None
+    return _request_now.set(timezone.now().isoformat()), _request_deadline.set(deadline)
+
+
+def end_request(token):
+    """Restore the context captured before begin_request()"""
+    now_token, deadline_token = token
+    _request_deadline.reset(deadline_token)
+    _request_now.reset(now_token)
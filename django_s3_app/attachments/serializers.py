@@ -17,6 +17,20 @@ class PresignedUploadRequestSerializer(serializers.Serializer):
     notes = serializers.CharField(required=False, allow_blank=True)
     checksum = serializers.CharField(max_length=64, required=False, allow_blank=True)
 
+class PresignedUploadBatchRequestSerializer(serializers.Serializer):
+    """Serializer for a batch of presigned upload URL requests"""
+
+    MAX_FILES = 100
+
+    files = PresignedUploadRequestSerializer(many=True)
+
+    def validate_files(self, value):
+        if not value:
+            raise serializers.ValidationError('At least one file is required')
+        if len(value) > self.MAX_FILES:
+            raise serializers.ValidationError(f'At most {self.MAX_FILES} files per request')
+        return value
+
 class PresignedUploadResponseSerializer(serializers.Serializer):
     """Serializer for presigned upload URL response"""
     
@@ -51,6 +65,26 @@ class DocumentStatusUpdateSerializer(serializers.Serializer):
     label = serializers.CharField(max_length=255, required=False, allow_blank=True)
     notes = serializers.CharField(required=False, allow_blank=True)
 
+class DocumentStatusBatchItemSerializer(serializers.Serializer):
+    """One document of a batch status update"""
+
+    s3_key = serializers.CharField(max_length=500)
+    upload_status = serializers.CharField(max_length=50)
+
+class DocumentStatusBatchUpdateSerializer(serializers.Serializer):
+    """Serializer for updating the status of several documents in one request"""
+
+    MAX_DOCUMENTS = 100
+
+    documents = DocumentStatusBatchItemSerializer(many=True)
+
+    def validate_documents(self, value):
+        if not value:
+            raise serializers.ValidationError('At least one document is required')
+        if len(value) > self.MAX_DOCUMENTS:
+            raise serializers.ValidationError(f'At most {self.MAX_DOCUMENTS} documents per request')
+        return value
+
 
 class AssignDocumentToOrderSerializer(serializers.Serializer):
     """Serializer for assigning document to order request"""
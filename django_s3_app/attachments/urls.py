@@ -6,10 +6,12 @@ from django.urls import path
 from django.http import JsonResponse
 from .views import (
     PresignedUploadView,
+    PresignedUploadBatchView,
     PublicUrlView,
     DocumentMetadataView,
     DocumentListView,
     UpdateOrderDocumentsView,
+    UpdateOrderDocumentsBatchView,
     AssignDocumentToOrderView
 )
 
@@ -25,13 +27,15 @@ urlpatterns = [
     
     # Document upload and management
     path('presigned-upload/', PresignedUploadView.as_view(), name='presigned_upload'),
+    path('presigned-upload/batch/', PresignedUploadBatchView.as_view(), name='presigned_upload_batch'),
     path('public-url/', PublicUrlView.as_view(), name='public_url'),
     
     # Document metadata and listing
     path('metadata/<path:s3_key>/', DocumentMetadataView.as_view(), name='document_metadata'),
     path('documents/', DocumentListView.as_view(), name='document_list'),
 
-    # Document status updates (path: converter matches slashes in S3 keys)
+    # Document status updates (path: converter matches slashes in S3 keys, so batch/ comes first)
+    path('status/batch/', UpdateOrderDocumentsBatchView.as_view(), name='update_order_documents_batch'),
     path('status/<path:s3_key>/', UpdateOrderDocumentsView.as_view(), name='update_order_documents'),
 
     # Assign document to order (AdminAccess required)
@@ -2,31 +2,148 @@
 Django REST Framework views for attachment management
 """
 
+import contextvars
+import hashlib
+import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+import orjson
+import zstandard
+from cachetools import TTLCache
 from rest_framework import status
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from attachments.dbHandling.order_requests_service import DocumentObject
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from attachments.dbHandling.order_requests_service import DocumentObject, order_requests_service
 from keycloak_auth.drf_authentication import KeycloakAuthentication
 from keycloak_auth.permissions import AdminAccess, DocumentOwnerPermission, InterestedRolesAccess, ViewAccess, UploadAccess
 from keycloak_auth.service import keycloak_service
+from s3_service.service import s3_service, sanitize_key_part
 from .models import DocumentMetadata
 from .serializers import (
     PresignedUploadRequestSerializer,
+    PresignedUploadBatchRequestSerializer,
     PresignedUploadResponseSerializer,
     PublicUrlRequestSerializer,
     DocumentStatusUpdateSerializer,
+    DocumentStatusBatchUpdateSerializer,
     AssignDocumentToOrderSerializer
 )
 from .document_handler import document_handler
+from .metadata_cache import DOCUMENT_METADATA_CACHE_TTL, document_metadata_cache_key, invalidate_document_metadata
 
 logger = logging.getLogger(__name__)
 
+# Shared read-only stand-in for objects without user metadata
+EMPTY_METADATA = MappingProxyType({})
 
-class PresignedUploadView(APIView):
+# Roles that may view or assign any user's documents
+ADMIN_ROLES = frozenset({'DOC_VIEWALL', 'DOC_UPLALL'})
+
+# Assembled document metadata is cached with the S3 ETag it was built from (see metadata_cache)
+CACHE_COMPRESSION_LEVEL = 3
+
+
+DOCUMENT_METADATA_CACHE_CONTROL = 'private, max-age=300'
+
+# s3_key -> order_req_id; fixed for an object's lifetime (assigning a document copies it to a new key),
+# so a repeated metadata read can fetch the MongoDB record while S3 answers the HEAD
+ORDER_REQ_ID_CACHE_TTL = 3600
+ORDER_REQ_ID_CACHE_MAXSIZE = 50_000
+METADATA_LOOKUP_WORKERS = 8
+_order_req_ids = TTLCache(maxsize=ORDER_REQ_ID_CACHE_MAXSIZE, ttl=ORDER_REQ_ID_CACHE_TTL)
+_order_req_ids_lock = threading.Lock()
+_metadata_lookup_executor = ThreadPoolExecutor(
+    max_workers=METADATA_LOOKUP_WORKERS,
+    thread_name_prefix='doc-metadata-lookup'
+)
+
+
+# zstd (de)compressor objects must not be shared between threads, so keep one pair per thread
+_zstd = threading.local()
+
+
+def _compressed_cache_set(key: str, value, timeout: int) -> None:
+    """cache.set a JSON-compatible value as zstd-compressed JSON to cut Redis bytes per hit"""
+    compressor = getattr(_zstd, 'compressor', None)
+    if compressor is None:
+        compressor = _zstd.compressor = zstandard.ZstdCompressor(level=CACHE_COMPRESSION_LEVEL)
+    cache.set(key, compressor.compress(orjson.dumps(value, default=str)), timeout)
+
+
+def _compressed_cache_get(key: str):
+    """Reverse of _compressed_cache_set; None on a miss or an unreadable entry"""
+    blob = cache.get(key)
+    if blob is None:
+        return None
+    decompressor = getattr(_zstd, 'decompressor', None)
+    if decompressor is None:
+        decompressor = _zstd.decompressor = zstandard.ZstdDecompressor()
+    try:
+        return orjson.loads(decompressor.decompress(blob))
+    except (zstandard.ZstdError, orjson.JSONDecodeError, TypeError) as e:
+        logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+        return None
+
+
+def _document_metadata_etag(s3_etag: str, doc: dict) -> str:
+    """HTTP ETag for a metadata response: the S3 ETag plus a digest of the MongoDB-derived fields"""
+    digest = hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f'"{s3_etag}-{digest}"'
+
+
+def _document_metadata_response(request, doc: dict, etag: str) -> Response:
+    """200 with the metadata, or an empty 304 when the client already holds this version"""
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(doc, status=status.HTTP_200_OK)
+    response['ETag'] = etag
+    response['Cache-Control'] = DOCUMENT_METADATA_CACHE_CONTROL
+    return response
+
+
+def _error_response(message: str, status_code: int, **extra) -> Response:
+    """Error body {'error': message, ...extra} with the given status"""
+    return Response({'error': message, **extra}, status=status_code)
+
+
+def _invalid_request_response(errors) -> Response:
+    """400 for a serializer that failed validation"""
+    return Response({'error': 'Invalid request data', 'details': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+def _presigned_upload_data(response_data, many: bool = False):
+    """Upload responses are built server-side; only run them through the serializer in DEBUG"""
+    if settings.DEBUG:
+        return PresignedUploadResponseSerializer(response_data, many=many).data
+    return response_data
+
+
+class JSONAPIView(APIView):
+    """
+    APIView for the JSON-only, token-authenticated endpoints in this module:
+    fixed JSON parser/renderer, no content negotiation, throttling, versioning or OPTIONS metadata
+    """
+    renderer_classes = [JSONRenderer]
+    parser_classes = [JSONParser]
+    throttle_classes = []
+    versioning_class = None
+    metadata_class = None
+
+    _renderer = JSONRenderer()
+
+    def perform_content_negotiation(self, request, force=False):
+        return self._renderer, self._renderer.media_type
+
+
+class PresignedUploadView(JSONAPIView):
     """
     Generate presigned upload URL for S3
     
@@ -38,10 +155,7 @@ class PresignedUploadView(APIView):
     def post(self, request):
         serializer = PresignedUploadRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(
-                {'error': 'Invalid request data', 'details': serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _invalid_request_response(serializer.errors)
         
         try:
             # Extract validated data (use snake_case keys from serializer)
@@ -60,23 +174,48 @@ class PresignedUploadView(APIView):
                 checksum=data.get('checksum')
             )
             
-            # Prepare response so serializer finds expected top-level keys
-            # metadata returned from the handler already contains the keys the serializer expects
+            # metadata returned from the handler already has the PresignedUploadResponseSerializer shape
             response_data = dict(metadata) if isinstance(metadata, dict) else {}
             response_data['presigned_url'] = presigned_url
 
-            # Return serialized response (treating response_data as the instance to be serialized)
-            response_serializer = PresignedUploadResponseSerializer(response_data)
-            return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+            return Response(_presigned_upload_data(response_data), status=status.HTTP_201_CREATED)
             
         except Exception as e:
             logger.error(f"Failed to create presigned upload URL: {e}")
-            return Response(
-                {'error': 'Failed to generate upload URL'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return _error_response('Failed to generate upload URL', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PresignedUploadBatchView(JSONAPIView):
+    """
+    Generate presigned upload URLs for several files in one request
+
+    POST /api/v1/presigned-upload/batch/
+    """
+    authentication_classes = [KeycloakAuthentication]
+    permission_classes = [IsAuthenticated, UploadAccess, InterestedRolesAccess]
+
+    def post(self, request):
+        serializer = PresignedUploadBatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return _invalid_request_response(serializer.errors)
 
-class PublicUrlView(APIView):
+        try:
+            user_email = keycloak_service.get_user_email_from_request(request)
+
+            uploads = []
+            for presigned_url, metadata in document_handler.create_presigned_upload_urls(
+                serializer.validated_data['files'], user_email
+            ):
+                response_data = dict(metadata)
+                response_data['presigned_url'] = presigned_url
+                uploads.append(response_data)
+
+            return Response({'uploads': _presigned_upload_data(uploads, many=True)}, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            logger.error(f"Failed to create presigned upload URLs: {e}")
+            return _error_response('Failed to generate upload URLs', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PublicUrlView(JSONAPIView):
     """
     #DIV: Not important, as it is making a doc open for public access without any token/keys
     Generate public URL for document access
@@ -89,10 +228,7 @@ class PublicUrlView(APIView):
     def post(self, request):
         serializer = PublicUrlRequestSerializer(data=request.data)
         if not serializer.is_valid():
-            return Response(
-                {'error': 'Invalid request data', 'details': serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            return _invalid_request_response(serializer.errors)
         
         try:
             data = serializer.validated_data
@@ -106,22 +242,16 @@ class PublicUrlView(APIView):
             )
             
             if not public_url:
-                return Response(
-                    {'error': 'Document not found or not ready'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+                return _error_response('Document not found or not ready', status.HTTP_404_NOT_FOUND)
 
             response_data = {'public_url': public_url}
             return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Failed to generate public URL: {e}")
-            return Response(
-                {'error': 'Failed to generate public URL'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return _error_response('Failed to generate public URL', status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class DocumentMetadataView(APIView):
+class DocumentMetadataView(JSONAPIView):
     """
     Retrieve document metadata from S3 and MongoDB
 
@@ -130,60 +260,83 @@ class DocumentMetadataView(APIView):
     authentication_classes = [KeycloakAuthentication]
     permission_classes = [IsAuthenticated, ViewAccess, InterestedRolesAccess]
 
-    @method_decorator(cache_page(300))  # Cache for 5 minutes
     def get(self, request, s3_key):
         try:
-            from s3_service.service import s3_service
-            from .dbHandling.order_requests_service import order_requests_service
+            cache_key = document_metadata_cache_key(s3_key)
+            cached = _compressed_cache_get(cache_key)
+
+            # Nothing cached but the order is known from an earlier read: start the MongoDB
+            # lookup now so it runs alongside the S3 HEAD (copy_context keeps the request budget)
+            mongo_future = None
+            if cached is None:
+                with _order_req_ids_lock:
+                    known_order_req_id = _order_req_ids.get(s3_key)
+                if known_order_req_id:
+                    mongo_future = _metadata_lookup_executor.submit(
+                        contextvars.copy_context().run,
+                        order_requests_service.get_document_from_order, known_order_req_id, s3_key
+                    )
 
             # Get document metadata from S3
             s3_metadata = s3_service.get_object_metadata(s3_key)
             if not s3_metadata:
-                return Response(
-                    {'error': 'Document not found in S3'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+                if mongo_future:
+                    mongo_future.cancel()
+                return _error_response('Document not found in S3', status.HTTP_404_NOT_FOUND)
+
+            # Reuse the assembled metadata while the S3 object is unchanged
+            if cached and cached['etag'] == s3_metadata.get('etag'):
+                return _document_metadata_response(request, cached['doc'], cached['response_etag'])
 
             # Extract order_req_id from S3 metadata
-            order_req_id = s3_metadata.get('metadata', {}).get('order_req_id')
+            order_req_id = (s3_metadata.get('metadata') or EMPTY_METADATA).get('order_req_id')
 
             # Get additional metadata from MongoDB if order_req_id is available
             mongo_doc = None
             if order_req_id:
-                mongo_doc = order_requests_service.get_document_from_order(order_req_id, s3_key)
+                with _order_req_ids_lock:
+                    _order_req_ids[s3_key] = order_req_id
+                if mongo_future and order_req_id == known_order_req_id:
+                    mongo_doc = mongo_future.result()
+                else:
+                    mongo_doc = order_requests_service.get_document_from_order(order_req_id, s3_key)
+            elif mongo_future:
+                mongo_future.cancel()
 
             # Create DocumentMetadata object from S3 + MongoDB data
             document = DocumentMetadata.from_s3_metadata(s3_key, s3_metadata, mongo_doc.to_dict() if mongo_doc else None)
 
             # Return document data
             response_data = document.to_dict()
-            return Response(response_data, status=status.HTTP_200_OK)
+            response_etag = _document_metadata_etag(s3_metadata.get('etag'), response_data)
+            _compressed_cache_set(
+                cache_key,
+                {'etag': s3_metadata.get('etag'), 'doc': response_data, 'response_etag': response_etag},
+                DOCUMENT_METADATA_CACHE_TTL
+            )
+            return _document_metadata_response(request, response_data, response_etag)
 
         except Exception as e:
             logger.error(f"Failed to retrieve document metadata: {e}")
-            return Response(
-                {'error': 'Document not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            return _error_response('Document not found', status.HTTP_404_NOT_FOUND)
 
-class DocumentListView(APIView):
+class DocumentListView(JSONAPIView):
     """
     List documents for a user from S3 or MongoDB
     Users can view their own documents or documents for orders they have access to
     Admins (DOC_VIEWALL, DOC_UPLALL) can view any documents
 
     GET /api/v1/documents/?userEmail=<email>&orderReqId=<id>
+
+    fields=minimal lists S3 documents from the listing alone (no per-object
+    HEAD): file_name is taken from the key and content_type, user metadata
+    and label are left empty
     """
     authentication_classes = [KeycloakAuthentication]
     permission_classes = [IsAuthenticated, ViewAccess]
 
     def get(self, request):
         try:
-            from .dbHandling.order_requests_service import order_requests_service
-            from s3_service.service import s3_service
-            from keycloak_auth.permissions import DocumentOwnerPermission
-            import re
-
             # Swap parameter priority: userEmail is primary, orderReqId is optional
             user_email = request.query_params.get('userEmail')
             order_req_id = request.query_params.get('orderReqId')
@@ -192,7 +345,7 @@ class DocumentListView(APIView):
             user_roles = keycloak_service.get_user_roles_from_request(request)
 
             # Check if user has admin access
-            is_admin = any(role in user_roles for role in ['DOC_VIEWALL', 'DOC_UPLALL'])
+            is_admin = not ADMIN_ROLES.isdisjoint(user_roles)
 
             # Default to current user if no userEmail provided
             if not user_email:
@@ -200,61 +353,90 @@ class DocumentListView(APIView):
 
             # Non-admin users can only view their own documents
             if not is_admin and user_email != current_user_email:
-                return Response(
-                    {'error': 'You can only view your own documents'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+                return _error_response('You can only view your own documents', status.HTTP_403_FORBIDDEN)
+
+            # Pagination: numeric offset, or the opaque nextToken returned by a previous S3 listing
+            limit = int(request.query_params.get('limit', 50))
+            offset = int(request.query_params.get('offset', 0))
+            page_token = request.query_params.get('nextToken')
+            next_token = None
+            minimal = request.query_params.get('fields', 'full') == 'minimal'
 
             # If order_req_id is provided, get documents from MongoDB for that order
             if order_req_id:
                 order_data = order_requests_service.get_order_request(order_req_id)
                 if not order_data:
-                    return Response(
-                        {'error': 'Order request not found'},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
+                    return _error_response('Order request not found', status.HTTP_404_NOT_FOUND)
 
                 documents_data = order_data.get('Documents', [])
 
                 # Filter by user_email
                 documents_data = [doc for doc in documents_data if doc.get('user_email') == user_email and doc.get('upload_status')=="Completed"]
 
+                total_count = len(documents_data)
+                paginated_documents = documents_data[offset:offset + limit]
+                has_more = offset + limit < total_count
+
             else:
                 # No order_req_id: List documents from S3 under user_email folder
 
                 # Sanitize user_email for S3 prefix (same logic as in s3_service)
-                def _sanitize_key_part(value: str) -> str:
-                    sanitized = re.sub(r'[^A-Za-z0-9_\-]', '_', value)
-                    return sanitized[:128]
-
-                sanitized_email = _sanitize_key_part(user_email)
+                sanitized_email = sanitize_key_part(user_email)
 
-                # List objects from S3 with user_email prefix
+                # List only the requested page from S3 (user_email prefix); a continuation
+                # token resumes the listing, otherwise the first `offset` keys are skipped
+                skip = 0 if page_token else offset
+                documents_data = []
                 try:
-                    response = s3_service.s3_client.list_objects_v2(
+                    paginator = s3_service.s3_client.get_paginator('list_objects_v2')
+                    listing = paginator.paginate(
                         Bucket=s3_service.bucket_name,
-                        Prefix=f'{sanitized_email}/'
-                    )
-
-                    documents_data = []
-                    if 'Contents' in response:
-                        for obj in response['Contents']:
+                        Prefix=f'{sanitized_email}/',
+                        PaginationConfig={
+                            'MaxItems': skip + limit,
+                            'PageSize': min(skip + limit, 1000),
+                            'StartingToken': page_token
+                        }
+                    ).build_full_result()
+                    next_token = listing.get('NextToken')
+
+                    objects = listing.get('Contents', [])[skip:]
+                    if minimal:
+                        # Everything comes from the listing entries; no HEAD requests
+                        for obj in objects:
+                            s3_key = obj['Key']
+                            last_modified = obj.get('LastModified')
+                            documents_data.append({
+                                's3_key': s3_key,
+                                'file_name': s3_key.rpartition('/')[2],
+                                'content_type': '',
+                                'file_size': obj.get('Size'),
+                                'checksum': obj.get('ETag', '').strip('"'),
+                                'user_email': user_email,
+                                'label': None,
+                                'upload_status': 'completed',  # If in S3, it's completed
+                                'created_at': last_modified.isoformat() if last_modified else None,
+                                'updated_at': last_modified.isoformat() if last_modified else None
+                            })
+                    elif objects:
+                        # Fetch object metadata for the page's keys concurrently
+                        metadata_list = s3_service.get_objects_metadata([obj['Key'] for obj in objects])
+                        for obj, s3_metadata in zip(objects, metadata_list):
                             s3_key = obj['Key']
-
-                            # Get object metadata
-                            s3_metadata = s3_service.get_object_metadata(s3_key)
                             if s3_metadata:
+                                object_metadata = s3_metadata.get('metadata') or EMPTY_METADATA
+                                last_modified = obj.get('LastModified')
                                 doc_data = {
                                     's3_key': s3_key,
-                                    'file_name': s3_metadata.get('metadata', {}).get('file_name', s3_key.split('/')[-1]),
+                                    'file_name': object_metadata.get('file_name', s3_key.rpartition('/')[2]),
                                     'content_type': s3_metadata.get('content_type', ''),
                                     'file_size': s3_metadata.get('content_length'),
                                     'checksum': s3_metadata.get('etag'),
-                                    'user_email': s3_metadata.get('metadata', {}).get('user_email', user_email),
-                                    'label': s3_metadata.get('metadata', {}).get('label'),
+                                    'user_email': object_metadata.get('user_email', user_email),
+                                    'label': object_metadata.get('label'),
                                     'upload_status': 'completed',  # If in S3, it's completed
-                                    'created_at': obj.get('LastModified').isoformat() if obj.get('LastModified') else None,
-                                    'updated_at': obj.get('LastModified').isoformat() if obj.get('LastModified') else None
+                                    'created_at': last_modified.isoformat() if last_modified else None,
+                                    'updated_at': last_modified.isoformat() if last_modified else None
                                 }
                                 documents_data.append(doc_data)
 
@@ -262,30 +444,96 @@ class DocumentListView(APIView):
                     logger.error(f"Failed to list S3 objects for user {user_email}: {e}")
                     documents_data = []
 
-            # Paginate results
-            limit = int(request.query_params.get('limit', 50))
-            offset = int(request.query_params.get('offset', 0))
-
-            total_count = len(documents_data)
-            paginated_documents = documents_data[offset:offset + limit]
+                # The S3 listing stops at this page, so the total is unknown; clients
+                # follow nextToken while hasMore is set
+                total_count = None
+                paginated_documents = documents_data
+                has_more = next_token is not None
 
             response_data = {
                 'documents': paginated_documents,
                 'totalCount': total_count,
+                'hasMore': has_more,
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'nextToken': next_token
             }
 
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.error(f"Failed to list documents: {e}")
-            return Response(
-                {'error': 'Failed to retrieve documents'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return _error_response('Failed to retrieve documents', status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class UpdateOrderDocumentsView(APIView):
+def _status_update_order(request, s3_key: str, s3_metadata):
+    """
+    Check one uploaded S3 object before its status update.
+    Returns (order_req_id, None), or (None, error response).
+    """
+    if not s3_metadata:
+        logger.error(f"Document not found in S3: {s3_key}")
+        return None, _error_response('Document not found in S3', status.HTTP_404_NOT_FOUND, s3_key=s3_key)
+
+    # Extract order_req_id from S3 metadata
+    object_metadata = s3_metadata.get('metadata') or EMPTY_METADATA
+    order_req_id = object_metadata.get('order_req_id')
+    if not order_req_id:
+        logger.warning(f"S3 object missing order_req_id metadata: {s3_key}")
+        return None, _error_response('Document missing order request metadata', status.HTTP_400_BAD_REQUEST, s3_key=s3_key)
+
+    # Check permissions using new permission system
+    # Create temporary DocumentMetadata object for permission checking
+    temp_document = DocumentMetadata(
+        s3_key=s3_key,
+        user_email=object_metadata.get('user_email', ''),
+        order_req_id=order_req_id
+    )
+    permission_checker = DocumentOwnerPermission()
+    if not permission_checker.check_document_access(request, temp_document):
+        return None, _error_response('Insufficient permissions', status.HTTP_403_FORBIDDEN, s3_key=s3_key)
+
+    return order_req_id, None
+
+
+def _document_object_from_s3(s3_key: str, s3_metadata, order_req_id: str) -> DocumentObject:
+    """
+    DocumentObject built from the uploaded S3 object, used to register a document whose
+    background registration was lost or has not landed yet
+    """
+    object_metadata = s3_metadata.get('metadata') or EMPTY_METADATA
+    return DocumentObject(
+        s3_key=s3_key,
+        file_name=object_metadata.get('file_name', s3_key.rpartition('/')[2]),
+        content_type=s3_metadata.get('content_type', ''),
+        file_size=s3_metadata.get('content_length'),
+        checksum=s3_metadata.get('etag'),
+        user_email=object_metadata.get('user_email', ''),
+        order_req_id=order_req_id,
+        label=object_metadata.get('label'),
+        notes=object_metadata.get('notes'),
+        bucket_name=s3_service.bucket_name,
+        sse_algorithm=s3_metadata.get('sse_algorithm') or 'AES256'
+    )
+
+
+def _status_response_data(s3_key: str, s3_metadata, order_req_id: str, new_status: str) -> dict:
+    """Updated document metadata from S3, as returned by the status views"""
+    object_metadata = s3_metadata.get('metadata') or EMPTY_METADATA
+    last_modified = s3_metadata.get('last_modified')
+    return {
+        's3_key': s3_key,
+        'file_name': object_metadata.get('file_name', s3_key.rpartition('/')[2]),
+        'content_type': s3_metadata.get('content_type', ''),
+        'file_size': s3_metadata.get('content_length'),
+        'checksum': s3_metadata.get('etag'),
+        'user_email': object_metadata.get('user_email', ''),
+        'order_req_id': order_req_id,
+        'upload_status': new_status,
+        'updated_at': last_modified.isoformat() if last_modified else None
+    }
+
+
+class UpdateOrderDocumentsView(JSONAPIView):
     """
     Update document status and order documents
 
@@ -296,98 +544,102 @@ class UpdateOrderDocumentsView(APIView):
 
     def put(self, request, s3_key):
         try:
-            # Verify document exists in S3 before updating MongoDB
-            from s3_service.service import s3_service
-            from .dbHandling.order_requests_service import order_requests_service
-
-             
-
-
-            s3_metadata = s3_service.get_object_metadata(s3_key)
-            if not s3_metadata:
-                logger.error(f"Document not found in S3: {s3_key}")
-                return Response(
-                    {'error': 'Document not found in S3', 's3_key': s3_key},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
-            # Extract order_req_id from S3 metadata
-            order_req_id = s3_metadata.get('metadata', {}).get('order_req_id')
-            if not order_req_id:
-                logger.warning(f"S3 object missing order_req_id metadata: {s3_key}")
-                return Response(
-                    {'error': 'Document missing order request metadata'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Check permissions using new permission system
-            # Create temporary DocumentMetadata object for permission checking
-            temp_document = DocumentMetadata(
-                s3_key=s3_key,
-                user_email=s3_metadata.get('metadata', {}).get('user_email', ''),
-                order_req_id=order_req_id
-            )
-            permission_checker = DocumentOwnerPermission()
-            if not permission_checker.check_document_access(request, temp_document):
-                return Response(
-                    {'error': 'Insufficient permissions'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-
-            # Determine new status: if client provided a body validate it,
+            # Determine new status first (no I/O): if client provided a body validate it,
             # otherwise assume Completed for the uploaded object.
             if request.data:
                 serializer = DocumentStatusUpdateSerializer(data=request.data)
                 if not serializer.is_valid():
-                    return Response(
-                        {'error': 'Invalid request data', 'details': serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                # Update document status in MongoDB
+                    return _invalid_request_response(serializer.errors)
                 data = serializer.validated_data
                 new_status = data.get('upload_status')
             else:
                 # No body provided by client; treat as successful upload completion
                 new_status = 'Completed'
 
+            # Verify document exists in S3 before updating MongoDB
+            s3_metadata = s3_service.get_object_metadata(s3_key)
+            order_req_id, error = _status_update_order(request, s3_key, s3_metadata)
+            if error is not None:
+                return error
+
+            # Update document status in MongoDB, registering the document if the order lacks it
             success = order_requests_service.update_document_status_in_order(
                 order_req_id,
                 s3_key,
-                new_status
+                new_status,
+                document=_document_object_from_s3(s3_key, s3_metadata, order_req_id)
             )
 
             if not success:
                 logger.error(f"Failed to update document status in MongoDB: {s3_key}")
-                return Response(
-                    {'error': 'Failed to update document status in database'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+                return _error_response('Failed to update document status in database', status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Return updated document metadata from S3
-            response_data = {
-                's3_key': s3_key,
-                'file_name': s3_metadata.get('metadata', {}).get('file_name', s3_key.split('/')[-1]),
-                'content_type': s3_metadata.get('content_type', ''),
-                'file_size': s3_metadata.get('content_length'),
-                'checksum': s3_metadata.get('etag'),
-                'user_email': s3_metadata.get('metadata', {}).get('user_email', ''),
-                'order_req_id': order_req_id,
-                'upload_status': new_status,
-                'updated_at': s3_metadata.get('last_modified').isoformat() if s3_metadata.get('last_modified') else None
-            }
+            response_data = _status_response_data(s3_key, s3_metadata, order_req_id, new_status)
 
             logger.info(f"Successfully updated document status: {s3_key} -> {new_status}")
             return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             logger.error(f"Failed to update document status: {e}")
-            return Response(
-                {'error': 'Failed to update document status'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return _error_response('Failed to update document status', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
+class UpdateOrderDocumentsBatchView(JSONAPIView):
+    """
+    Update the status of several uploaded documents in one request, with one
+    bulk-status call per order request instead of one PUT per document
 
-class AssignDocumentToOrderView(APIView):
+    PUT /api/v1/status/batch/
+    """
+    authentication_classes = [KeycloakAuthentication]
+    permission_classes = [IsAuthenticated, AdminAccess]
+
+    def put(self, request):
+        serializer = DocumentStatusBatchUpdateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return _invalid_request_response(serializer.errors)
+
+        try:
+            items = serializer.validated_data['documents']
+            s3_keys = [item['s3_key'] for item in items]
+
+            # Verify every document exists in S3 and may be updated before touching MongoDB
+            metadata_list = s3_service.get_objects_metadata(s3_keys)
+            by_order = {}
+            response_documents = []
+            for item, s3_metadata in zip(items, metadata_list):
+                s3_key = item['s3_key']
+                order_req_id, error = _status_update_order(request, s3_key, s3_metadata)
+                if error is not None:
+                    return error
+                updates, documents = by_order.setdefault(order_req_id, ([], {}))
+                updates.append({'s3_key': s3_key, 'upload_status': item['upload_status']})
+                documents[s3_key] = _document_object_from_s3(s3_key, s3_metadata, order_req_id)
+                response_documents.append(_status_response_data(s3_key, s3_metadata, order_req_id, item['upload_status']))
+
+            failed_orders = [
+                order_req_id
+                for order_req_id, (updates, documents) in by_order.items()
+                if not order_requests_service.update_document_statuses_bulk(order_req_id, updates, documents=documents)
+            ]
+            if failed_orders:
+                logger.error(f"Failed to update document statuses in MongoDB: {failed_orders}")
+                return _error_response(
+                    'Failed to update document status in database',
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    order_req_ids=failed_orders
+                )
+
+            logger.info(f"Successfully updated {len(items)} document statuses across {len(by_order)} order requests")
+            return Response({'documents': response_documents}, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            logger.error(f"Failed to update document statuses: {e}")
+            return _error_response('Failed to update document statuses', status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AssignDocumentToOrderView(JSONAPIView):
     """
     Move document from user_email folder to order_req_id folder
     Users with upload access can assign their own documents to orders
@@ -400,16 +652,10 @@ class AssignDocumentToOrderView(APIView):
 
     def post(self, request):
         try:
-            from s3_service.service import s3_service
-            from .dbHandling.order_requests_service import order_requests_service
-
             # Validate request data
             serializer = AssignDocumentToOrderSerializer(data=request.data)
             if not serializer.is_valid():
-                return Response(
-                    {'error': 'Invalid request data', 'details': serializer.errors},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                return _invalid_request_response(serializer.errors)
 
             data = serializer.validated_data
             s3_key = data['s3_key']
@@ -419,53 +665,40 @@ class AssignDocumentToOrderView(APIView):
             # Check if user can assign this document
             current_user_email = keycloak_service.get_user_email_from_request(request)
             user_roles = keycloak_service.get_user_roles_from_request(request)
-            is_admin = any(role in user_roles for role in ['DOC_UPLALL', 'DOC_VIEWALL'])
+            is_admin = not ADMIN_ROLES.isdisjoint(user_roles)
 
             # Non-admin users can only assign their own documents
             if not is_admin and user_email != current_user_email:
-                return Response(
-                    {'error': 'You can only assign your own documents to orders'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+                return _error_response('You can only assign your own documents to orders', status.HTTP_403_FORBIDDEN)
 
             logger.info(f"Assigning document to order: {s3_key} -> {order_req_id}")
 
             # Verify document exists in S3
             current_metadata = s3_service.get_object_metadata(s3_key)
             if not current_metadata:
-                return Response(
-                    {'error': 'Document not found in S3', 's3_key': s3_key},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
-            # Move document in S3 and update metadata
-            new_s3_key = s3_service.move_document_to_order(s3_key, order_req_id, user_email)
-            if not new_s3_key:
-                return Response(
-                    {'error': 'Failed to move document - document may not be in user folder'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                return _error_response('Document not found in S3', status.HTTP_404_NOT_FOUND, s3_key=s3_key)
 
-            # Get updated metadata
-            updated_metadata = s3_service.get_object_metadata(new_s3_key)
+            # Move document in S3 and update metadata (returns the moved object's metadata)
+            updated_metadata = s3_service.move_document_to_order(s3_key, order_req_id, user_email, current_metadata)
             if not updated_metadata:
-                logger.error(f"Failed to retrieve metadata after move: {new_s3_key}")
-                return Response(
-                    {'error': 'Document moved but failed to retrieve updated metadata'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+                return _error_response('Failed to move document - document may not be in user folder', status.HTTP_400_BAD_REQUEST)
+            new_s3_key = updated_metadata['s3_key']
+
+            invalidate_document_metadata(s3_key, new_s3_key)
+            document_handler.invalidate_public_url(s3_key)
 
             # Create DocumentObject for MongoDB
+            object_metadata = updated_metadata.get('metadata') or EMPTY_METADATA
             document_object = DocumentObject(
                 s3_key=new_s3_key,
-                file_name=updated_metadata.get('metadata', {}).get('file_name', new_s3_key.split('/')[-1]),
+                file_name=object_metadata.get('file_name', new_s3_key.rpartition('/')[2]),
                 content_type=updated_metadata.get('content_type', ''),
                 file_size=updated_metadata.get('content_length'),
                 checksum=updated_metadata.get('etag'),
                 user_email=user_email,
                 order_req_id=order_req_id,
-                label=updated_metadata.get('metadata', {}).get('label'),
-                notes=updated_metadata.get('metadata', {}).get('notes'),
+                label=object_metadata.get('label'),
+                notes=object_metadata.get('notes'),
                 bucket_name=s3_service.bucket_name,
                 sse_algorithm=updated_metadata.get('sse_algorithm', 'AES256'),
                 upload_status='completed',  # Document already uploaded
@@ -476,10 +709,7 @@ class AssignDocumentToOrderView(APIView):
             success = order_requests_service.add_single_document_to_order(order_req_id, document_object)
             if not success:
                 logger.warning(f"Failed to add document to MongoDB order: {order_req_id}")
-                return Response(
-                    {'error': 'Document moved in S3 but failed to update database'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+                return _error_response('Document moved in S3 but failed to update database', status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             # Prepare response
             response_data = {
@@ -498,7 +728,4 @@ class AssignDocumentToOrderView(APIView):
 
         except Exception as e:
             logger.error(f"Failed to assign document to order: {e}")
-            return Response(
-                {'error': 'Failed to assign document to order'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            return _error_response('Failed to assign document to order', status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
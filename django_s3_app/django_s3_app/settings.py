@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'keycloak_auth.middleware.KeycloakAuthenticationMiddleware',
+    'attachments.middleware.RequestContextMiddleware',
 ]
 
 ROOT_URLCONF = 'django_s3_app.urls'
@@ -89,6 +90,22 @@ DATABASES = {
     }
 }
 
+# Cache - shared Redis when REDIS_URL is set, otherwise per-process memory
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -258,6 +275,8 @@ KEYCLOAK_AUDIENCE = config('KEYCLOAK_AUDIENCE', default=KEYCLOAK_CLIENT_ID)
 # FastAPI Integration Configuration (was FastPay)
 # FASTAPI app base URL used by services that call the FastAPI app
 FASTAPI_APP_BASE_URL = config('FASTAPI_APP_BASE_URL', default='')
+# Overall latency budget (seconds) for outbound calls made while serving one request
+REQUEST_BUDGET_S = config('REQUEST_BUDGET_S', default=25, cast=float)
 
 # Document Orders API Configuration
 DOCUMENT_ORDERS_API_BASE_URL = config('DOCUMENT_ORDERS_API_BASE_URL', default='')
@@ -3,6 +3,8 @@ Common document access exception scenarios
 Pre-defined exception types and helper functions
 """
 
+from .exceptions import send_document_access_exception
+
 class DocumentExceptionTypes:
     """Standard exception types for document access"""
     
@@ -37,8 +39,6 @@ class DocumentExceptionTypes:
 
 def create_access_denied_exception(order_req_id: str, s3_key: str, user_id: str, **kwargs):
     """Helper for access denied exceptions"""
-    from .exceptions import send_document_access_exception
-    
     return send_document_access_exception(
         order_req_id=order_req_id,
         s3_key=s3_key,
@@ -51,8 +51,6 @@ def create_access_denied_exception(order_req_id: str, s3_key: str, user_id: str,
 
 def create_file_not_found_exception(order_req_id: str, s3_key: str, user_id: str, **kwargs):
     """Helper for file not found exceptions"""
-    from .exceptions import send_document_access_exception
-    
     return send_document_access_exception(
         order_req_id=order_req_id,
         s3_key=s3_key,
@@ -65,8 +63,6 @@ def create_file_not_found_exception(order_req_id: str, s3_key: str, user_id: str
 
 def create_upload_failed_exception(order_req_id: str, s3_key: str, user_id: str, reason: str, **kwargs):
     """Helper for upload failure exceptions"""
-    from .exceptions import send_document_access_exception
-    
     return send_document_access_exception(
         order_req_id=order_req_id,
         s3_key=s3_key,
@@ -80,8 +76,6 @@ def create_upload_failed_exception(order_req_id: str, s3_key: str, user_id: str,
 def create_file_too_large_exception(order_req_id: str, s3_key: str, user_id: str, 
                                   file_size: int, max_size: int, **kwargs):
     """Helper for file size limit exceptions"""
-    from .exceptions import send_document_access_exception
-    
     return send_document_access_exception(
         order_req_id=order_req_id,
         s3_key=s3_key,
@@ -96,8 +90,6 @@ def create_file_too_large_exception(order_req_id: str, s3_key: str, user_id: str
 def create_invalid_file_type_exception(order_req_id: str, s3_key: str, user_id: str, 
                                      file_type: str, allowed_types: list, **kwargs):
     """Helper for invalid file type exceptions"""
-    from .exceptions import send_document_access_exception
-    
     return send_document_access_exception(
         order_req_id=order_req_id,
         s3_key=s3_key,
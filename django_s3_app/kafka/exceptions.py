@@ -10,6 +10,9 @@ from typing import Callable, Any, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Marks "attribute not present" so each argument is probed with a single getattr
+_SENTINEL = object()
+
 def kafka_exception_handler(exception_type: str = 'document_access_error'):
     """
     Decorator to catch exceptions and send them to Kafka
@@ -31,7 +34,7 @@ def kafka_exception_handler(exception_type: str = 'document_access_error'):
                     exception_type=exception_type,
                     error_message=str(e),
                     function_name=func.__name__,
-                    stack_trace=traceback.format_exc(),
+                    stack_trace=traceback.format_exc,
                     context=context
                 )
                 
@@ -46,11 +49,13 @@ def _extract_context_from_args(args, kwargs) -> Dict[str, Any]:
     
     # Look for common patterns in arguments
     for arg in args:
-        if hasattr(arg, 'order_req_id'):
-            context['order_req_id'] = getattr(arg, 'order_req_id')
-        if hasattr(arg, 's3_key'):
-            context['s3_key'] = getattr(arg, 's3_key')
-        if isinstance(arg, str) and arg.startswith('SB'):  # Order ID pattern
+        value = getattr(arg, 'order_req_id', _SENTINEL)
+        if value is not _SENTINEL:
+            context['order_req_id'] = value
+        value = getattr(arg, 's3_key', _SENTINEL)
+        if value is not _SENTINEL:
+            context['s3_key'] = value
+        if isinstance(arg, str) and arg[:2] == 'SB':  # Order ID pattern
             context['order_req_id'] = arg
     
     # Extract from kwargs
@@ -61,17 +66,27 @@ def _extract_context_from_args(args, kwargs) -> Dict[str, Any]:
     return context
 
 def _send_exception_to_kafka(exception_type: str, error_message: str, 
-                           function_name: str, stack_trace: str, 
+                           function_name: str, stack_trace: Callable[[], str], 
                            context: Dict[str, Any]):
-    """Send exception details to Kafka"""
+    """
+    Send exception details to Kafka
+
+    stack_trace is called (inside the caller's except block) only once the producer is
+    known to be available, so the traceback isn't formatted when Kafka is down
+    """
     try:
-        from .service import kafka_service
+        from .service import get_kafka_service
         
+        kafka_service = get_kafka_service()
+        if kafka_service.producer is None:
+            logger.debug(f"Kafka producer not available, not reporting exception from {function_name}")
+            return
+
         kafka_service.send_document_exception({
             'exception_type': exception_type,
             'error_message': error_message,
             'function_name': function_name,
-            'stack_trace': stack_trace,
+            'stack_trace': stack_trace(),
             'order_req_id': context.get('order_req_id'),
             's3_key': context.get('s3_key'),
             'user_id': context.get('user_id'),
@@ -101,9 +116,9 @@ def send_document_access_exception(order_req_id: str, s3_key: str, user_id: str,
         )
     """
     try:
-        from .service import kafka_service
-        
-        kafka_service.send_document_access_exception(
+        from .service import get_kafka_service
+
+        get_kafka_service().send_document_access_exception(
             order_req_id=order_req_id,
             s3_key=s3_key,
             user_id=user_id,
@@ -112,4 +127,4 @@ def send_document_access_exception(order_req_id: str, s3_key: str, user_id: str,
             **kwargs
         )
     except Exception as e:
-        logger.error(f"Failed to send document access exception: {e}")
\ No newline at end of file
+        logger.error(f"Failed to send document access exception: {e}")
@@ -3,8 +3,10 @@ Kafka service for AWS MSK integration
 Handles sending document access exceptions to Kafka topics
 """
 
-import json
 import logging
+import queue
+import threading
+import orjson
 from typing import Dict, Any, Optional
 from kafka import KafkaProducer
 from kafka.errors import KafkaError
@@ -13,25 +15,48 @@ from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Messages wait here for the publishing thread; when it falls behind, new ones are dropped
+PUBLISH_QUEUE_MAXSIZE = 10_000
+PUBLISH_BATCH_SIZE = 100
+PUBLISH_STOP_TIMEOUT = 5  # seconds close() waits for the publishing thread
+_STOP = object()
+
+def _serialize_value(value: Dict[str, Any]) -> bytes:
+    """orjson encodes datetimes natively; naive ones are treated as UTC, anything else unknown via str()"""
+    return orjson.dumps(value, default=str, option=orjson.OPT_NAIVE_UTC)
+
 class KafkaService:
     """Service for sending messages to AWS MSK (Kafka)"""
     
     def __init__(self):
         self.producer = None
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=PUBLISH_QUEUE_MAXSIZE)
+        self._publisher: Optional[threading.Thread] = None
         self._initialize_producer()
+        if self.producer:
+            self._publisher = threading.Thread(
+                target=self._publish_loop, name='kafka-publisher', daemon=True
+            )
+            self._publisher.start()
     
     def _initialize_producer(self):
         """Initialize Kafka producer with AWS MSK configuration"""
         try:
             kafka_config = {
                 'bootstrap_servers': settings.KAFKA_BOOTSTRAP_SERVERS,
-                'value_serializer': lambda v: json.dumps(v).encode('utf-8'),
+                'value_serializer': _serialize_value,
                 'key_serializer': lambda k: k.encode('utf-8') if k else None,
                 'acks': 'all',  # Wait for all replicas to acknowledge
                 'retries': 3,
                 'retry_backoff_ms': 1000,
                 'request_timeout_ms': 30000,
                 'delivery_timeout_ms': 120000,
+                # Exception traffic is bursty: wait briefly so a burst goes out as a few
+                # compressed batches instead of one request per message
+                'linger_ms': 50,
+                'batch_size': 64 * 1024,
+                'compression_type': 'lz4',
+                'max_in_flight_requests_per_connection': 5,
             }
             
             # Add security configuration if credentials are provided
@@ -58,7 +83,7 @@ class KafkaService:
             exception_data: Dictionary containing exception details
             
         Returns:
-            bool: True if message sent successfully, False otherwise
+            bool: True if the message was queued for publishing, False otherwise
         """
         if not self.producer:
             logger.warning("Kafka producer not available, skipping message")
@@ -67,35 +92,60 @@ class KafkaService:
         try:
             # Prepare the message
             message = {
-                'timestamp': timezone.now().isoformat(),
+                'timestamp': timezone.now(),
                 'topic': 'DocumentExceptions',
                 'key': 'DocumentAccessLog',
                 **exception_data
             }
             
-            # Send to Kafka topic
-            future = self.producer.send(
-                topic='DocumentExceptions',
-                key='DocumentAccessLog',
-                value=message
-            )
-            
-            # Wait for the message to be sent (with timeout)
-            record_metadata = future.get(timeout=10)
-            
-            logger.info(
-                f"Exception message sent to topic {record_metadata.topic} "
-                f"partition {record_metadata.partition} offset {record_metadata.offset}"
-            )
+            # Hand off to the publishing thread; the caller never waits on the producer
+            self._queue.put_nowait(message)
             return True
             
-        except KafkaError as e:
-            logger.error(f"Failed to send exception to Kafka: {e}")
+        except queue.Full:
+            logger.warning("Kafka publish queue full, dropping exception message")
             return False
         except Exception as e:
             logger.error(f"Unexpected error sending to Kafka: {e}")
             return False
+
+    def _publish_loop(self):
+        """Drain the queue in chunks of up to PUBLISH_BATCH_SIZE messages until close()"""
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < PUBLISH_BATCH_SIZE:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for message in batch:
+                if message is _STOP:
+                    return
+                self._publish(message)
+
+    def _publish(self, message: Dict[str, Any]):
+        """Send one message; the producer batches in the background and reports delivery via callbacks"""
+        try:
+            self.producer.send(
+                topic='DocumentExceptions',
+                key='DocumentAccessLog',
+                value=message
+            ).add_callback(self._on_send_success).add_errback(self._on_send_error)
+        except Exception as e:
+            logger.error(f"Unexpected error sending to Kafka: {e}")
     
+    @staticmethod
+    def _on_send_success(record_metadata):
+        logger.info(
+            f"Exception message sent to topic {record_metadata.topic} "
+            f"partition {record_metadata.partition} offset {record_metadata.offset}"
+        )
+
+    @staticmethod
+    def _on_send_error(error: KafkaError):
+        logger.error(f"Failed to send exception to Kafka: {error}")
+
     def send_document_access_exception(self, order_req_id: str, s3_key: str, 
                                      user_id: str, exception_type: str, 
                                      error_message: str, **kwargs) -> bool:
@@ -133,7 +183,15 @@ class KafkaService:
         return self.send_document_exception(exception_data)
     
     def close(self):
-        """Close the Kafka producer"""
+        """Stop the publishing thread, then flush and close the Kafka producer"""
+        if self._publisher:
+            try:
+                self._queue.put(_STOP, timeout=PUBLISH_STOP_TIMEOUT)
+                self._publisher.join(timeout=PUBLISH_STOP_TIMEOUT)
+            except queue.Full:
+                logger.warning("Kafka publish queue still full at close, pending messages dropped")
+            self._publisher = None
+
         if self.producer:
             try:
                 self.producer.flush()
@@ -142,5 +200,22 @@ class KafkaService:
             except Exception as e:
                 logger.error(f"Error closing Kafka producer: {e}")
 
-# Global instance
-kafka_service = KafkaService()
\ No newline at end of file
+# Global instance, created on first use so imports and management commands
+# don't connect to the brokers
+_kafka_service: Optional[KafkaService] = None
+_kafka_service_lock = threading.Lock()
+
+def get_kafka_service() -> KafkaService:
+    """Return the shared KafkaService, creating it on first call"""
+    global _kafka_service
+    if _kafka_service is None:
+        with _kafka_service_lock:
+            if _kafka_service is None:
+                _kafka_service = KafkaService()
+    return _kafka_service
+
+def __getattr__(name):
+    # Keep `from kafka.service import kafka_service` working
+    if name == 'kafka_service':
+        return get_kafka_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -6,12 +6,71 @@ from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth.models import User, AnonymousUser
 from django.contrib.auth import get_user_model
 from .service import keycloak_service
+from cachetools import TTLCache
+import hashlib
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Verified tokens -> (user_info, expires_at, jwks_verified); entries live at most TOKEN_CACHE_TTL
+# seconds and never past the token's own expiry. jwks_verified marks entries whose token also
+# passed verify_token (signature, issuer, audience), not just the userinfo endpoint
+TOKEN_CACHE_TTL = 300
+_TOKEN_CACHE = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+_TOKEN_CACHE_LOCK = threading.Lock()
+
+
+def token_hash(token: str) -> str:
+    """Cache key for a token (the raw token is never kept as a key)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_cached_user_info(token: str, require_jwks_verified: bool = False):
+    """
+    Return cached user info for a previously verified, unexpired token, or None.
+    With require_jwks_verified, entries only checked against the userinfo endpoint are ignored
+    """
+    key = token_hash(token)
+    with _TOKEN_CACHE_LOCK:
+        entry = _TOKEN_CACHE.get(key)
+        if entry is None:
+            return None
+        user_info, expires_at, jwks_verified = entry
+        if expires_at <= time.time():
+            del _TOKEN_CACHE[key]
+            return None
+    if require_jwks_verified and not jwks_verified:
+        return None
+    return user_info
+
+
+def cache_user_info(token: str, user_info: dict, jwks_verified: bool = False):
+    """Remember user info for a verified token until min(exp, now + TOKEN_CACHE_TTL)"""
+    exp = keycloak_service._decode_jwt_unverified(token).get('exp')
+    if not exp:
+        return
+    expires_at = min(float(exp), time.time() + TOKEN_CACHE_TTL)
+    if expires_at <= time.time():
+        return
+    key = token_hash(token)
+    with _TOKEN_CACHE_LOCK:
+        # Never downgrade an entry that already passed JWKS verification
+        existing = _TOKEN_CACHE.get(key)
+        if not jwks_verified and existing is not None and existing[2]:
+            return
+        _TOKEN_CACHE[key] = (user_info, expires_at, jwks_verified)
+
+
+def purge(token_hash_value: str):
+    """Drop a cached token (e.g. on logout or revocation); takes the value from token_hash()"""
+    with _TOKEN_CACHE_LOCK:
+        _TOKEN_CACHE.pop(token_hash_value, None)
+
+
 class KeycloakAuthenticationBackend(BaseBackend):
     """
     Custom authentication backend for Keycloak OAuth2 integration
@@ -24,10 +83,14 @@ class KeycloakAuthenticationBackend(BaseBackend):
         if not token:
             return None
             
-        # Validate token with Keycloak
-        user_info = keycloak_service.get_user_info_with_roles(token)
-        if not user_info:
-            return None
+        # Reuse user info from an earlier verification of this token
+        user_info = get_cached_user_info(token)
+        if user_info is None:
+            # Validate token with Keycloak
+            user_info = keycloak_service.get_user_info_with_roles(token)
+            if not user_info:
+                return None
+            cache_user_info(token, user_info)
         
         # Return KeycloakUser (no DB storage)
         return KeycloakUser(user_info, user_info.get('app_roles', []))
@@ -49,6 +112,8 @@ class KeycloakUser:
     def __init__(self, user_info: dict, roles: list = None):
         self.user_info = user_info
         self.roles = roles or []
+        # Set view of roles for O(1) membership checks
+        self._roles_set = frozenset(self.roles)
         self.is_authenticated = True
         self.is_active = True
         self.is_anonymous = False
@@ -67,11 +132,11 @@ class KeycloakUser:
     
     def has_role(self, role_name: str) -> bool:
         """Check if user has specific role"""
-        return role_name in self.roles
+        return role_name in self._roles_set
     
     def has_any_role(self, role_names: list) -> bool:
         """Check if user has any of the specified roles"""
-        return any(role in self.roles for role in role_names)
+        return not self._roles_set.isdisjoint(role_names)
     
     def get_roles(self) -> list:
         """Get user roles"""
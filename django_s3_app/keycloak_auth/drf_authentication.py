@@ -2,7 +2,7 @@
 Django REST Framework authentication class for Keycloak
 """
 
-from keycloak_auth.authentication import KeycloakUser
+from keycloak_auth.authentication import KeycloakUser, cache_user_info, get_cached_user_info
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
@@ -32,7 +32,12 @@ class KeycloakAuthentication(BaseAuthentication):
             return None
 
         try:
-            
+            # Tokens that recently passed JWKS verification are served from the cache without
+            # calling Keycloak; entries cached by the middleware (userinfo only) don't count
+            user_info = get_cached_user_info(token, require_jwks_verified=True)
+            if user_info is not None:
+                return (KeycloakUser(user_info, user_info.get('app_roles', [])), token)
+
             # Prefer local verification (JWKS) if configured
             verified = keycloak_service.verify_token(token)
             if not verified:
@@ -45,6 +50,7 @@ class KeycloakAuthentication(BaseAuthentication):
                 logger.warning("Token verified but failed to retrieve user info from Keycloak")
                 raise AuthenticationFailed('Failed to retrieve user details')
 
+            cache_user_info(token, user_info, jwks_verified=True)
             return (KeycloakUser(user_info, user_info.get('app_roles', [])), token)
             """ 
             # Validate token with Keycloak
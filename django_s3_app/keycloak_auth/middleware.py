@@ -10,6 +10,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Path prefixes that never need Keycloak authentication (a tuple so str.startswith checks them all)
+_SKIP_PATHS = ('/admin/', '/static/', '/media/')
+
 class KeycloakAuthenticationMiddleware(MiddlewareMixin):
     """
     Middleware to handle Keycloak authentication for regular Django views
@@ -25,8 +28,7 @@ class KeycloakAuthenticationMiddleware(MiddlewareMixin):
         Supports both Bearer tokens and session cookies
         """
         # Skip authentication for certain paths
-        skip_paths = ['/admin/', '/static/', '/media/']
-        if any(request.path.startswith(path) for path in skip_paths):
+        if request.path.startswith(_SKIP_PATHS):
             return None
 
         try:
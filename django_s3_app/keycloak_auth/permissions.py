@@ -4,12 +4,56 @@ Role-based permission classes for Keycloak authentication
 
 from rest_framework.permissions import BasePermission
 from rest_framework.exceptions import PermissionDenied
+from cachetools import TTLCache
 import logging
+import threading
+from types import SimpleNamespace
 from typing import List, Optional
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared default for users without a roles attribute (no new list per check)
+_EMPTY_ROLES = ()
+
+# Roles that may access any user's documents
+_ADMIN_ROLES = frozenset({'DOC_VIEWALL', 'DOC_UPLALL'})
+
+# order_req_id -> interested roles (None when the order has none), shared by all permission checks
+INTERESTED_ROLES_CACHE_TTL = 60
+INTERESTED_ROLES_CACHE_MAXSIZE = 8192
+_INTERESTED_ROLES_CACHE = TTLCache(maxsize=INTERESTED_ROLES_CACHE_MAXSIZE, ttl=INTERESTED_ROLES_CACHE_TTL)
+_INTERESTED_ROLES_CACHE_LOCK = threading.Lock()
+_NOT_CACHED = object()
+
+
+def _auth_ok(request) -> bool:
+    """True when the request carries an authenticated user"""
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated
+
+
+def _request_user_email(request, source: str) -> Optional[str]:
+    """
+    userEmail / user_email from request.query_params or request.data (source), None when absent;
+    remembered on the request since several stacked permission classes ask for it
+    """
+    attr = f'_req_user_email_{source}'
+    email = getattr(request, attr, _NOT_CACHED)
+    if email is _NOT_CACHED:
+        params = getattr(request, source, None)
+        email = (params.get('userEmail') or params.get('user_email')) if params and hasattr(params, 'get') else None
+        setattr(request, attr, email)
+    return email
+
+
+def _role_set(user) -> frozenset:
+    """User roles as a frozenset; KeycloakUser precomputes it, other user objects are converted"""
+    roles = getattr(user, '_roles_set', None)
+    if roles is None:
+        roles = frozenset(getattr(user, 'roles', None) or ())
+    return roles
+
 
 class ServiceAccountMixin:
     """
@@ -20,8 +64,21 @@ class ServiceAccountMixin:
         """
         Detect service account and override request.user with admin API response
         Returns True if service account was detected and handled, False otherwise
+
+        Runs once per request; the other permission checks of the same request reuse the result
+        instead of repeating the admin API lookup
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if getattr(request, '_service_account_processed', False):
+            return request._service_account_result
+
+        result = self._process_service_account(request)
+        request._service_account_processed = True
+        request._service_account_result = result
+        return result
+
+    def _process_service_account(self, request):
+        """Service account detection and user override behind _handle_service_account"""
+        if not _auth_ok(request):
             return False
 
         # Check if this is a service account request
@@ -30,86 +87,58 @@ class ServiceAccountMixin:
         logger.debug(f"Current request user email: {current_email}")
         service_account_email = getattr(settings, 'KEYCLOAK_SERVICE_ACCOUNT_EMAIL', 'sb.docadmin@drworkplace.microsoft.com')
 
-        if current_email == service_account_email:
-            try:
-                from .service import keycloak_service
-                # Get target user email from request context
-                target_user_email = self._get_target_user_email(request)
-
-                # Build a proxy 'effective user' rather than mutating request.user (some frameworks
-                # expose read-only properties). We'll attach it to request._effective_user and
-                # permission checks should read from that when present.
-                from types import SimpleNamespace
-
-                if target_user_email:
-                    effective_attrs = {}
-                    target_user_info = keycloak_service.get_user_info_with_roles_admin(target_user_email)
-                    if target_user_info:
-                        # Create a SimpleNamespace with fields from admin_user_info and fallback to
-                        # original request.user attributes when missing
-                        
-                        # Copy a few well-known attributes
-                        effective_attrs['is_authenticated'] = True
-                        effective_attrs['email'] = target_user_info.get('email')
-                        effective_attrs['roles'] = target_user_info.get('roles', [])
-                        effective_attrs['sub'] = target_user_info.get('sub')
-                        effective_attrs['preferred_username'] = target_user_info.get('preferred_username')
-                        # include any remaining items for convenience
-                        for k, v in target_user_info.items():
-                            if k not in effective_attrs:
-                                effective_attrs[k] = v
-
-
-                        #request._effective_user = SimpleNamespace(**effective_attrs)
-                        request.user = SimpleNamespace(**effective_attrs)
-                        # print request.user
-                        logger.info(f"Service account request processed for target user: {target_user_email}")
-                        
-
-                
-                else: # Service account without specific target user - keep service account privileges
-                    
-                    
-                    effective_attrs = {
-                        'is_authenticated': True,
-                        'email': service_account_email,
-                        'roles': getattr(request.user, 'roles', []),
-                        'sub': getattr(request.user, 'sub', None),
-                        'preferred_username': getattr(request.user, 'preferred_username', None)
-                    }
-                request._effective_user = SimpleNamespace(**effective_attrs)
-                # print the request
-                logger.info(f"Service account request processed with service account privileges: {request._effective_user}")
-                
-                return True
+        if current_email != service_account_email:
+            return False
 
-            except Exception as e:
-                logger.error(f"Failed to handle service account request: {e}")
-                return False
+        try:
+            from .service import keycloak_service
+            # Get target user email from request context
+            target_user_email = self._get_target_user_email(request)
+
+            if target_user_email:
+                target_user_info = keycloak_service.get_user_info_with_roles_admin(target_user_email)
+                if not target_user_info:
+                    # Unknown target user: no identity, so document-level checks deny
+                    logger.warning(f"Service account target user not found: {target_user_email}")
+                    request._effective_user = SimpleNamespace()
+                    return True
+
+                # Act as the target user: well-known attributes first, then the rest of the
+                # admin API response for convenience
+                effective_attrs = {
+                    'is_authenticated': True,
+                    'email': target_user_info.get('email'),
+                    'roles': target_user_info.get('roles', _EMPTY_ROLES),
+                    'sub': target_user_info.get('sub'),
+                    'preferred_username': target_user_info.get('preferred_username')
+                }
+                for k, v in target_user_info.items():
+                    effective_attrs.setdefault(k, v)
+                request._effective_user = request.user = SimpleNamespace(**effective_attrs)
+
+            else:  # Service account without specific target user - keep service account privileges
+                request._effective_user = SimpleNamespace(
+                    is_authenticated=True,
+                    email=service_account_email,
+                    roles=getattr(request.user, 'roles', _EMPTY_ROLES),
+                    sub=getattr(request.user, 'sub', None),
+                    preferred_username=getattr(request.user, 'preferred_username', None)
+                )
+
+            logger.info(f"Service account request processed ({target_user_email or 'self'})")
+            return True
 
-        return False
-        return False
+        except Exception as e:
+            logger.error(f"Failed to handle service account request: {e}")
+            return False
     
     def _get_target_user_email(self, request):
         """
         Extract target user email from request context
         Override in subclasses if needed for specific logic
         """
-        # Try to get from query parameters first
-        if hasattr(request, 'query_params'):
-            # Accept both camelCase and snake_case query parameters
-            target_email = request.query_params.get('userEmail') or request.query_params.get('user_email')
-            if target_email:
-                return target_email
-                
-        # Try to get from request data
-        if hasattr(request, 'data') and request.data:
-            # Accept both camelCase and snake_case in request body
-            target_email = request.data.get('userEmail') or request.data.get('user_email')
-            if target_email:
-                return target_email
-                
-        return None
+        # Query parameters first, then the request body (camelCase or snake_case in both)
+        return _request_user_email(request, 'query_params') or _request_user_email(request, 'data')
     
     
 
@@ -118,33 +147,33 @@ class KeycloakRolePermission(BasePermission, ServiceAccountMixin):
     """
     Base permission class that checks Keycloak roles
     """
-    required_roles = []  # Override in subclasses
+    required_roles = frozenset()  # Override in subclasses
     
     def has_permission(self, request, view):
         """
         Check if user has required roles
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
             
         # Handle service account detection and user override
         self._handle_service_account(request)
         
         # Use standard frontend user logic pattern
-        user_roles = getattr(request.user, 'roles', [])
+        user_roles = _role_set(request.user)
         
         # If no roles required, just check if authenticated
         if not self.required_roles:
             return True
             
         # Check if user has any of the required roles
-        has_role = any(role in user_roles for role in self.required_roles)
+        has_role = not user_roles.isdisjoint(self.required_roles)
         
         if not has_role:
             logger.warning(
                 f"User {getattr(request.user, 'username', 'unknown')} "
-                f"lacks required roles {self.required_roles}. "
-                f"User roles: {user_roles}"
+                f"lacks required roles {sorted(self.required_roles)}. "
+                f"User roles: {sorted(user_roles)}"
             )
             
         return has_role
@@ -158,24 +187,37 @@ class KeycloakRolePermission(BasePermission, ServiceAccountMixin):
             
         Returns:
             List of interested role strings or None if not found
+
+        Results for orders that were fetched (including "no roles") are cached for
+        INTERESTED_ROLES_CACHE_TTL seconds; failed fetches are retried on the next check
         """
+        with _INTERESTED_ROLES_CACHE_LOCK:
+            cached = _INTERESTED_ROLES_CACHE.get(order_req_id, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            return cached
+
         try:
-            from ..attachments.dbHandling.order_requests_service import order_requests_service
+            from attachments.dbHandling.order_requests_service import order_requests_service
             
             # Get order request data from external API
             order_data = order_requests_service.get_order_request(order_req_id)
-            
-            if order_data and 'Interested_Roles' in order_data:
-                interested_roles = order_data['Interested_Roles']
-                if isinstance(interested_roles, list):
-                    logger.info(f"Retrieved {len(interested_roles)} interested roles for order: {order_req_id}")
-                    return interested_roles
-                else:
-                    logger.warning(f"Interested_Roles is not a list for order: {order_req_id}")
-                    return None
-            else:
+            if not order_data:
                 logger.info(f"No Interested_Roles found for order: {order_req_id}")
                 return None
+
+            interested_roles = order_data.get('Interested_Roles')
+            if isinstance(interested_roles, list):
+                logger.info(f"Retrieved {len(interested_roles)} interested roles for order: {order_req_id}")
+            else:
+                if interested_roles is None:
+                    logger.info(f"No Interested_Roles found for order: {order_req_id}")
+                else:
+                    logger.warning(f"Interested_Roles is not a list for order: {order_req_id}")
+                interested_roles = None
+
+            with _INTERESTED_ROLES_CACHE_LOCK:
+                _INTERESTED_ROLES_CACHE[order_req_id] = interested_roles
+            return interested_roles
                 
         except Exception as e:
             logger.error(f"Failed to get interested roles for order {order_req_id}: {e}")
@@ -199,25 +241,24 @@ class InterestedRolesAccess(BasePermission, ServiceAccountMixin):
         - No userEmail parameter provided (defaults to current user), OR
         - userEmail matches current user's email
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
 
         # Handle service account detection and user override
         self._handle_service_account(request)
 
         current_user_email = getattr(request.user, 'email', None)
-        user_roles = getattr(request.user, 'roles', [])
+        user_roles = _role_set(request.user)
 
         # Check if user has admin access (DOC_VIEWALL or DOC_UPLALL)
-        if any(role in user_roles for role in ['DOC_VIEWALL', 'DOC_UPLALL']):
+        if not _ADMIN_ROLES.isdisjoint(user_roles):
             return True
 
         # Check if userEmail parameter matches current user (or not provided)
-        request_user_email = None
         if hasattr(request, 'query_params'):
-            request_user_email = request.query_params.get('userEmail') or request.query_params.get('user_email')
-        elif hasattr(request, 'data') and request.data:
-            request_user_email = request.data.get('userEmail') or request.data.get('user_email')
+            request_user_email = _request_user_email(request, 'query_params')
+        else:
+            request_user_email = _request_user_email(request, 'data')
 
         # If no userEmail specified in request, allow (defaults to current user)
         if not request_user_email:
@@ -237,18 +278,18 @@ class InterestedRolesAccess(BasePermission, ServiceAccountMixin):
         """
         Check if user has interested roles for order or is document owner
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
 
         # Handle service account detection and user override
         self._handle_service_account(request)
 
         current_user_email = getattr(request.user, 'email', None)
-        user_roles = getattr(request.user, 'roles', [])
+        user_roles = _role_set(request.user)
 
         # Check if user has admin access (DOC_VIEWALL or DOC_UPLALL)
-        if any(role in user_roles for role in ['DOC_VIEWALL', 'DOC_UPLALL']):
-            logger.debug(f"User has admin access roles: {user_roles}")
+        if not _ADMIN_ROLES.isdisjoint(user_roles):
+            logger.debug(f"User has admin access roles: {sorted(user_roles)}")
             return True
 
         # Check if user is document owner
@@ -270,7 +311,7 @@ class InterestedRolesAccess(BasePermission, ServiceAccountMixin):
 
                 if interested_roles:
                     # Check if user has any of the interested roles
-                    has_interested_role = any(role in interested_roles for role in user_roles)
+                    has_interested_role = not _role_set(request.user).isdisjoint(interested_roles)
                     if has_interested_role:
                         return True
 
@@ -289,21 +330,21 @@ class UploadAccess(KeycloakRolePermission):
     """
     Permission for upload operations - requires DOC_UPL or DOC_UPLALL roles
     """
-    required_roles = ['DOC_UPL', 'DOC_UPLALL']
+    required_roles = frozenset({'DOC_UPL', 'DOC_UPLALL'})
 
 
 class ViewAccess(KeycloakRolePermission):
     """
     Permission for view operations - requires DOC_VIEW or DOC_VIEWALL roles
     """
-    required_roles = ['DOC_VIEW', 'DOC_VIEWALL']
+    required_roles = frozenset({'DOC_VIEW', 'DOC_VIEWALL'})
 
 
 class AdminAccess(KeycloakRolePermission):
     """
     Permission for admin operations - requires DOC_UPLALL or DOC_VIEWALL roles
     """
-    required_roles = ['DOC_UPLALL', 'DOC_VIEWALL']
+    required_roles = frozenset({'DOC_UPLALL', 'DOC_VIEWALL'})
 
 
 class OwnerOrAdminPermission(BasePermission, ServiceAccountMixin):
@@ -313,7 +354,7 @@ class OwnerOrAdminPermission(BasePermission, ServiceAccountMixin):
     
     def has_permission(self, request, view):
         """Basic authentication check"""
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
             
         # Handle service account detection and user override
@@ -324,7 +365,7 @@ class OwnerOrAdminPermission(BasePermission, ServiceAccountMixin):
         """
         Check if user is owner of the object or has admin/manager role
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
             
         # Handle service account detection and user override
@@ -334,7 +375,7 @@ class OwnerOrAdminPermission(BasePermission, ServiceAccountMixin):
         current_user_id = getattr(request.user, 'sub', None)
         
         # Use standard frontend user logic pattern
-        user_roles = getattr(request.user, 'roles', [])
+        user_roles = getattr(request.user, 'roles', _EMPTY_ROLES)
         
         # Check if user is owner (use email if available, fallback to user_id)
         obj_user_email = getattr(obj, 'user_email', None)
@@ -359,7 +400,7 @@ class DocumentOwnerPermission(BasePermission, ServiceAccountMixin):
     
     def has_permission(self, request, view):
         """Basic authentication check"""
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
             
         # Handle service account detection and user override
@@ -371,7 +412,7 @@ class DocumentOwnerPermission(BasePermission, ServiceAccountMixin):
         Check if user can access the document
         Returns True if access allowed, False otherwise
         """
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
+        if not _auth_ok(request):
             return False
             
         # Handle service account detection and user override
@@ -383,10 +424,10 @@ class DocumentOwnerPermission(BasePermission, ServiceAccountMixin):
         current_user_email = getattr(eff_user, 'email', None)
         current_user_id = getattr(eff_user, 'sub', None)
         # Use roles from the effective user when present
-        user_roles = getattr(eff_user, 'roles', [])
+        user_roles = _role_set(eff_user)
 
         # Users with global admin/view-all roles may access any document
-        if any(r in user_roles for r in ('DOC_VIEWALL', 'DOC_UPLALL')):
+        if not _ADMIN_ROLES.isdisjoint(user_roles):
             return True
 
         # Document owner can access (use email if available, fallback to user_id)
@@ -7,16 +7,43 @@ import boto3
 import uuid
 import re
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from botocore.exceptions import ClientError, NoCredentialsError, BotoCoreError
 from botocore.config import Config
-from typing import Dict, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from django.conf import settings
 from django.utils import timezone
 from threading import Lock
 
 logger = logging.getLogger(__name__)
 
+# HEAD requests are pure network wait, so metadata for many keys is fetched concurrently;
+# the client's connection pool is sized so those workers never queue for a connection
+METADATA_FETCH_WORKERS = 32
+MAX_POOL_CONNECTIONS = 64
+
+# Characters other than alphanumerics, dashes and underscores become underscores in S3 keys;
+# ASCII input (the common case) goes through str.translate, anything else through the regex
+_UNSAFE_KEY_CHARS = re.compile(r'[^A-Za-z0-9_\-]')
+_UNSAFE_KEY_CHARS_TABLE = str.maketrans({
+    c: '_' for c in map(chr, range(128)) if not (c.isalnum() or c in '_-')
+})
+_REPEATED_UNDERSCORES = re.compile(r'_+')
+
+
+def _replace_unsafe_key_chars(value: str) -> str:
+    if value.isascii():
+        return value.translate(_UNSAFE_KEY_CHARS_TABLE)
+    return _UNSAFE_KEY_CHARS.sub('_', value)
+
+
+def sanitize_key_part(value: str) -> str:
+    """Sanitize a value (user email, order id) for use as an S3 key prefix"""
+    # Trim excessive length to avoid very long keys
+    return _replace_unsafe_key_chars(value)[:128]
+
+
 class S3Service:
     """
     Service class for AWS S3 operations with Server-Side Encryption support
@@ -43,6 +70,11 @@ class S3Service:
 
         # Initialize S3 client
         self.s3_client = self._create_s3_client()
+
+        self._metadata_executor = ThreadPoolExecutor(
+            max_workers=METADATA_FETCH_WORKERS,
+            thread_name_prefix='s3-head'
+        )
     
     def _assume_role(self) -> Dict[str, str]:
         """
@@ -137,7 +169,8 @@ class S3Service:
                 retries={
                     'max_attempts': 3,
                     'mode': 'adaptive'
-                }
+                },
+                max_pool_connections=MAX_POOL_CONNECTIONS
             )
 
             # Create S3 client with temporary credentials
@@ -375,45 +408,64 @@ class S3Service:
                 logger.error(f"Failed to get object metadata: {e}")
                 raise
 
-    def move_document_to_order(self, s3_key: str, order_req_id: str, user_email: str) -> Optional[str]:
+    def get_objects_metadata(self, s3_keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get metadata for several objects with concurrent HEAD requests
+
+        Args:
+            s3_keys: S3 object keys
+
+        Returns:
+            Metadata dictionaries (None where not found) in the same order as s3_keys
+        """
+        if len(s3_keys) <= 1:
+            return [self.get_object_metadata(s3_key) for s3_key in s3_keys]
+        self._refresh_client_if_needed()
+        return list(self._metadata_executor.map(self.get_object_metadata, s3_keys))
+
+    def move_document_to_order(
+        self,
+        s3_key: str,
+        order_req_id: str,
+        user_email: str,
+        current_metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Move document from user_email folder to order_req_id folder
-        Updates metadata with order_req_id and returns new S3 key
+        Updates metadata with order_req_id and returns the moved object's metadata
 
         Args:
             s3_key: Current S3 key (should be in user_email folder)
             order_req_id: Order request ID to move document to
             user_email: User email for validation
+            current_metadata: get_object_metadata(s3_key) result if the caller already has it
 
         Returns:
-            New S3 key after move, or None if failed
+            Metadata of the moved object (same shape as get_object_metadata, plus
+            's3_key' holding the new key), or None if failed
         """
         try:
             # Refresh credentials if needed
             self._refresh_client_if_needed()
 
             # Get current object metadata
-            current_metadata = self.get_object_metadata(s3_key)
+            if current_metadata is None:
+                current_metadata = self.get_object_metadata(s3_key)
             if not current_metadata:
                 logger.error(f"Cannot move document - not found: {s3_key}")
                 return None
 
             # Validate that document is currently in user_email folder (not already in order folder)
-            import re
-            def _sanitize_key_part(value: str) -> str:
-                sanitized = re.sub(r'[^A-Za-z0-9_\-]', '_', value)
-                return sanitized[:128]
-
-            sanitized_email = _sanitize_key_part(user_email)
+            sanitized_email = sanitize_key_part(user_email)
             if not s3_key.startswith(f"{sanitized_email}/"):
                 logger.warning(f"Document not in user folder - cannot move: {s3_key}")
                 return None
 
             # Extract filename from current s3_key
-            filename = s3_key.split('/')[-1]
+            filename = s3_key.rpartition('/')[2]
 
             # Generate new S3 key under order_req_id folder
-            sanitized_order_id = _sanitize_key_part(order_req_id)
+            sanitized_order_id = sanitize_key_part(order_req_id)
             new_s3_key = f"{sanitized_order_id}/{filename}"
 
             # Prepare updated metadata
@@ -437,14 +489,26 @@ class S3Service:
                 **sse_params
             }
 
-            self.s3_client.copy_object(**copy_args)
+            copy_response = self.s3_client.copy_object(**copy_args)
             logger.info(f"Copied document to new location: {s3_key} -> {new_s3_key}")
 
             # Delete old object
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
             logger.info(f"Deleted old document: {s3_key}")
 
-            return new_s3_key
+            # The copy has the source's content and the metadata written above; the copy
+            # response carries the new ETag and encryption, so no HEAD on the new key is needed
+            copy_result = copy_response.get('CopyObjectResult', {})
+            return {
+                's3_key': new_s3_key,
+                'content_length': current_metadata.get('content_length'),
+                'content_type': copy_args['ContentType'],
+                'last_modified': copy_result.get('LastModified'),
+                'etag': copy_result.get('ETag', '').strip('"'),
+                'sse_algorithm': copy_response.get('ServerSideEncryption'),
+                'sse_kms_key_id': copy_response.get('SSEKMSKeyId'),
+                'metadata': new_metadata
+            }
 
         except ClientError as e:
             logger.error(f"Failed to move document: {e}")
@@ -476,19 +540,12 @@ class S3Service:
         # Sanitize the original filename for use in S3 key
         def _sanitize_filename(name: str, max_length: int = 50) -> str:
             # Keep only alphanumerics, dashes, underscores; replace others with underscore
-            sanitized = re.sub(r'[^A-Za-z0-9_\-]', '_', name)
+            sanitized = _replace_unsafe_key_chars(name)
             # Remove consecutive underscores
-            sanitized = re.sub(r'_+', '_', sanitized)
+            sanitized = _REPEATED_UNDERSCORES.sub('_', sanitized)
             # Trim to max length
             return sanitized[:max_length].strip('_')
 
-        # Sanitize for directory prefixes
-        def _sanitize_key_part(value: str) -> str:
-            # Keep only alphanumerics, dashes and underscores; replace others with underscore
-            sanitized = re.sub(r'[^A-Za-z0-9_\-]', '_', value)
-            # Trim excessive length to avoid very long keys
-            return sanitized[:128]
-
         # Generate unique identifier and timestamp
         unique_id = str(uuid.uuid4())[:8]  # Use shorter UUID for readability
         timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
@@ -497,12 +554,12 @@ class S3Service:
         # Construct S3 key with original filename for easy identification
         # Format: {prefix}/{original_filename}_{date}_{uuid}{extension}
         if order_req_id:
-            prefix = _sanitize_key_part(str(order_req_id))
+            prefix = sanitize_key_part(str(order_req_id))
             s3_key = f"{prefix}/{sanitized_name}_{timestamp}_{unique_id}{extension}"
         else:
             if user_email:
                 # Sanitize user_email for use as folder name
-                sanitized_email = _sanitize_key_part(user_email)
+                sanitized_email = sanitize_key_part(user_email)
                 s3_key = f"{sanitized_email}/{sanitized_name}_{timestamp}_{unique_id}{extension}"
             else:
                 s3_key = f"anonymous/{sanitized_name}_{timestamp}_{unique_id}{extension}"
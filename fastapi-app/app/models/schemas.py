@@ -283,6 +283,14 @@ class OrderReqDocumentUpdate(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class OrderReqDocumentStatusUpdate(BaseModel):
+    """One entry of a bulk upload_status update"""
+    S3Key: str = Field(..., alias="s3_key", description="S3 object key of the document - mandatory")
+    UploadStatus: str = Field(..., alias="upload_status", description="New upload status - mandatory")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class ProductObj(BaseModel):
     """Product object inside OrderReq"""
     ProductName: str = Field(..., description="Product name - mandatory")
@@ -5,7 +5,7 @@ from typing import List
 from fastapi import APIRouter, HTTPException, Query, Path, status
 from fastapi.responses import JSONResponse
 
-from app.models.schemas import OrderReqCreate, OrderReqResponse, OrderReqUpdate, OrderReqNote, OrderReqDocument, OrderReqDocumentUpdate
+from app.models.schemas import OrderReqCreate, OrderReqResponse, OrderReqUpdate, OrderReqNote, OrderReqDocument, OrderReqDocumentUpdate, OrderReqDocumentStatusUpdate
 from app.services.order_req_service import OrderReqService
 from app.core.exceptions import NotFoundError, ConflictError, ValidationError, DatabaseError
 from app.core.logging import get_logger
@@ -195,13 +195,19 @@ async def get_order_req_document(
 
 @router.post("/{order_req_id}/Doc", status_code=201)
 async def append_order_req_document(order_req_id: str, document: OrderReqDocument):
-    """Append a document to the given OrderReq Documents array. Returns the appended document."""
+    """
+    Append a document to the given OrderReq Documents array. Returns the appended document (201),
+    or the already stored document with the same s3_key (200), so retried POSTs don't duplicate it.
+    """
     # Log incoming request
     logger.info(f"POST /{order_req_id}/Doc - Incoming request: order_req_id={order_req_id}")
     logger.debug(f"POST /{order_req_id}/Doc - Document payload: {document.model_dump(by_alias=True)}")
 
     try:
-        appended_doc = await OrderReqService.append_order_req_document(order_req_id, document)
+        appended_doc, created = await OrderReqService.append_order_req_document(order_req_id, document)
+        if not created:
+            logger.info(f"POST /{order_req_id}/Doc - Document with s3_key={document.S3Key} already present")
+            return JSONResponse(status_code=200, content=appended_doc)
         logger.info(f"POST /{order_req_id}/Doc - Successfully appended document with s3_key={document.S3Key}")
         return JSONResponse(status_code=201, content=appended_doc)
     except NotFoundError as e:
@@ -221,6 +227,33 @@ async def append_order_req_document(order_req_id: str, document: OrderReqDocumen
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+# Declared before the {s3_key:path} route so "bulk-status" is not captured as an s3_key
+@router.put("/{order_req_id}/Doc/bulk-status", status_code=200)
+async def bulk_update_order_req_document_status(order_req_id: str, updates: List[OrderReqDocumentStatusUpdate]):
+    """
+    Update upload_status for several documents of an OrderReq in one call.
+    Returns the s3_keys updated, the ones soft-deleted and the ones not found.
+    """
+    logger.info(f"PUT /{order_req_id}/Doc/bulk-status - Incoming request: order_req_id={order_req_id}, count={len(updates)}")
+
+    try:
+        result = await OrderReqService.bulk_update_document_status(order_req_id, updates)
+        logger.info(f"PUT /{order_req_id}/Doc/bulk-status - Updated {len(result['updated'])}, deleted {len(result['deleted'])}, not found {len(result['not_found'])}")
+        return JSONResponse(status_code=200, content=result)
+    except NotFoundError as e:
+        logger.warning(f"PUT /{order_req_id}/Doc/bulk-status - Not found: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValidationError as e:
+        logger.warning(f"PUT /{order_req_id}/Doc/bulk-status - Validation error: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except DatabaseError as e:
+        logger.error(f"PUT /{order_req_id}/Doc/bulk-status - Database error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        logger.error(f"PUT /{order_req_id}/Doc/bulk-status - Unexpected error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.put("/{order_req_id}/Doc/{s3_key:path}", status_code=200)
 async def update_order_req_document(
     order_req_id: str = Path(..., description="OrderReqID"),
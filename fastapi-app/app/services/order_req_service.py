@@ -1,15 +1,16 @@
 """
 Service layer for OrderReq collection operations
 """
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import uuid
 import random
 import re
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
 from app.models.documents import OrderReq
-from app.models.schemas import OrderReqCreate, OrderReqUpdate, OrderReqResponse, OrderReqNote, OrderReqDocument, OrderReqDocumentUpdate
+from app.models.schemas import OrderReqCreate, OrderReqUpdate, OrderReqResponse, OrderReqNote, OrderReqDocument, OrderReqDocumentUpdate, OrderReqDocumentStatusUpdate
 from app.services.user_service import UserService
 from app.core.exceptions import NotFoundError, ConflictError, ValidationError, DatabaseError
 from app.core.logging import get_logger
@@ -437,18 +438,23 @@ class OrderReqService:
             if not doc:
                 raise NotFoundError("OrderReq with Documents.s3_key", f"{order_req_id}/{s3_key}")
 
-            # Find the specific document from the Documents array
+            # Find the live document from the Documents array; a re-added s3_key can also
+            # have soft-deleted entries ahead of it
             matching_doc = None
+            deleted = False
             if doc.Documents:
                 for document in doc.Documents:
                     if document.get('s3_key') == s3_key:
                         # Check if document is soft-deleted
                         if document.get('is_deleted', False):
-                            raise NotFoundError("Document with s3_key (deleted)", s3_key)
+                            deleted = True
+                            continue
                         matching_doc = document
                         break
 
             if not matching_doc:
+                if deleted:
+                    raise NotFoundError("Document with s3_key (deleted)", s3_key)
                 raise NotFoundError("Document with s3_key", s3_key)
 
             # Serialize datetime objects for JSON response
@@ -460,14 +466,13 @@ class OrderReqService:
             raise DatabaseError(f"Failed to fetch document: {str(e)}")
 
     @staticmethod
-    async def append_order_req_document(order_req_id: str, document: OrderReqDocument) -> dict:
-        """Append a single document to an existing OrderReq Documents array. Returns the document dict."""
+    async def append_order_req_document(order_req_id: str, document: OrderReqDocument) -> Tuple[dict, bool]:
+        """
+        Append a single document to an existing OrderReq Documents array.
+        Idempotent per s3_key: if the order already holds a live (not soft-deleted) document with
+        that s3_key, nothing is written and the stored document is returned. Returns (document dict, created).
+        """
         try:
-            # ensure document exists
-            doc = await OrderReq.find_one(OrderReq.OrderReqID == order_req_id)
-            if not doc:
-                raise NotFoundError("OrderReq", order_req_id)
-
             # normalize incoming document
             doc_dict = document.model_dump(by_alias=True) if not isinstance(document, dict) else document
 
@@ -480,16 +485,28 @@ class OrderReqService:
             if 'is_deleted' not in doc_dict:
                 doc_dict['is_deleted'] = False
 
-            # atomic push
+            # atomic push, only if no live document with this s3_key is in the array yet
+            s3_key = doc_dict.get('s3_key')
+            live_match = {"s3_key": s3_key, "is_deleted": {"$ne": True}}
             result = await OrderReq.get_motor_collection().update_one(
-                {"OrderReqID": order_req_id},
+                {"OrderReqID": order_req_id, "Documents": {"$not": {"$elemMatch": live_match}}},
                 {"$push": {"Documents": doc_dict}, "$set": {"updatedAt": datetime.utcnow()}}
             )
             if result.matched_count == 0:
-                raise DatabaseError("Failed to append document: target OrderReq not found/modified")
+                # Either the order doesn't exist or the document is already there (e.g. a retried POST)
+                existing = await OrderReq.get_motor_collection().find_one(
+                    {"OrderReqID": order_req_id},
+                    projection={"_id": 0, "Documents": {"$elemMatch": live_match}}
+                )
+                if existing is None:
+                    raise NotFoundError("OrderReq", order_req_id)
+                if not existing.get("Documents"):
+                    raise DatabaseError("Failed to append document: target OrderReq not modified")
+                logger.info(f"Document {s3_key} already present on OrderReq {order_req_id}, not appended again")
+                return _serialize_document_dict(existing["Documents"][0]), False
 
             # Serialize datetime objects for JSON response
-            return _serialize_document_dict(doc_dict)
+            return _serialize_document_dict(doc_dict), True
         except Exception as e:
             if isinstance(e, NotFoundError):
                 raise
@@ -500,21 +517,6 @@ class OrderReqService:
     async def update_order_req_document(order_req_id: str, s3_key: str, update_data: OrderReqDocumentUpdate) -> dict:
         """Update a document's metadata in OrderReq Documents array"""
         try:
-            # First verify the document exists and is not deleted
-            doc = await OrderReq.find_one(
-                {"OrderReqID": order_req_id, "Documents.s3_key": s3_key}
-            )
-            if not doc:
-                raise NotFoundError("OrderReq with Documents.s3_key", f"{order_req_id}/{s3_key}")
-
-            # Check if document is deleted - cannot update deleted documents
-            if doc.Documents:
-                for document in doc.Documents:
-                    if document.get('s3_key') == s3_key:
-                        if document.get('is_deleted', False):
-                            raise ConflictError(f"Cannot update deleted document with s3_key {s3_key}")
-                        break
-
             # Build update dict with only provided fields
             update_dict = update_data.model_dump(by_alias=True, exclude_none=True)
 
@@ -522,32 +524,37 @@ class OrderReqService:
                 raise ValidationError("No fields provided for update", field="update_data")
 
             # Prefix all fields with Documents.$ for positional update
+            now = datetime.utcnow()
             positional_update = {f"Documents.$.{key}": value for key, value in update_dict.items()}
             # Always update the updated_at timestamp
-            positional_update["Documents.$.updated_at"] = datetime.utcnow()
-            positional_update["updatedAt"] = datetime.utcnow()
+            positional_update["Documents.$.updated_at"] = now
+            positional_update["updatedAt"] = now
 
-            # Update using positional operator $
-            result = await OrderReq.get_motor_collection().update_one(
-                {"OrderReqID": order_req_id, "Documents.s3_key": s3_key},
-                {"$set": positional_update}
+            # Update the live (not soft-deleted) document with the positional operator $ and
+            # return just that array element, all in one round trip
+            updated_doc = await OrderReq.get_motor_collection().find_one_and_update(
+                {
+                    "OrderReqID": order_req_id,
+                    "Documents": {"$elemMatch": {"s3_key": s3_key, "is_deleted": {"$ne": True}}}
+                },
+                {"$set": positional_update},
+                projection={"_id": 0, "Documents": {"$elemMatch": {"s3_key": s3_key, "is_deleted": {"$ne": True}}}},
+                return_document=ReturnDocument.AFTER
             )
 
-            if result.matched_count == 0:
+            if updated_doc is None:
+                # Nothing matched: tell a soft-deleted document apart from a missing one
+                existing = await OrderReq.get_motor_collection().find_one(
+                    {"OrderReqID": order_req_id, "Documents.s3_key": s3_key},
+                    projection={"_id": 1}
+                )
+                if existing:
+                    raise ConflictError(f"Cannot update deleted document with s3_key {s3_key}")
                 raise NotFoundError("OrderReq with Documents.s3_key", f"{order_req_id}/{s3_key}")
-            if result.modified_count == 0:
-                # This is OK - might mean no actual changes were made
-                logger.info(f"No modifications made to document {s3_key} - values may be unchanged")
 
-            # Fetch and return the updated document
-            updated_doc = await OrderReq.find_one(
-                {"OrderReqID": order_req_id, "Documents.s3_key": s3_key}
-            )
-            if updated_doc and updated_doc.Documents:
-                for document in updated_doc.Documents:
-                    if document.get('s3_key') == s3_key:
-                        # Serialize datetime objects for JSON response
-                        return _serialize_document_dict(document)
+            if updated_doc.get("Documents"):
+                # Serialize datetime objects for JSON response
+                return _serialize_document_dict(updated_doc["Documents"][0])
 
             raise DatabaseError("Failed to retrieve updated document")
 
@@ -557,6 +564,60 @@ class OrderReqService:
             logger.error(f"Error updating document {s3_key} in OrderReq {order_req_id}: {str(e)}")
             raise DatabaseError(f"Failed to update document: {str(e)}")
 
+    @staticmethod
+    async def bulk_update_document_status(order_req_id: str, updates: List[OrderReqDocumentStatusUpdate]) -> dict:
+        """
+        Set upload_status on several documents of one OrderReq in a single write.
+        Returns the s3_keys that were updated, those soft-deleted and those not found.
+        """
+        try:
+            if not updates:
+                raise ValidationError("No status updates provided", field="updates")
+
+            doc = await OrderReq.find_one(OrderReq.OrderReqID == order_req_id)
+            if not doc:
+                raise NotFoundError("OrderReq", order_req_id)
+
+            live_keys, all_keys = set(), set()
+            for document in (doc.Documents or []):
+                all_keys.add(document.get('s3_key'))
+                if not document.get('is_deleted', False):
+                    live_keys.add(document.get('s3_key'))
+
+            now = datetime.utcnow()
+            set_fields = {"updatedAt": now}
+            array_filters = []
+            updated, deleted, not_found = [], [], []
+            # Last status wins when the same s3_key appears twice (two filters on one element would conflict)
+            latest_status = {update.S3Key: update.UploadStatus for update in updates}
+            for index, (s3_key, upload_status) in enumerate(latest_status.items()):
+                if s3_key not in live_keys:
+                    (deleted if s3_key in all_keys else not_found).append(s3_key)
+                    continue
+                # One array filter per entry so every document is updated by the same update_one
+                ident = f"d{index}"
+                set_fields[f"Documents.$[{ident}].upload_status"] = upload_status
+                set_fields[f"Documents.$[{ident}].updated_at"] = now
+                if upload_status == 'completed':
+                    set_fields[f"Documents.$[{ident}].uploaded_at"] = now
+                # Soft-deleted entries can share the s3_key of a re-added live one
+                array_filters.append({f"{ident}.s3_key": s3_key, f"{ident}.is_deleted": {"$ne": True}})
+                updated.append(s3_key)
+
+            if array_filters:
+                await OrderReq.get_motor_collection().update_one(
+                    {"OrderReqID": order_req_id},
+                    {"$set": set_fields},
+                    array_filters=array_filters
+                )
+
+            return {"order_req_id": order_req_id, "updated": updated, "deleted": deleted, "not_found": not_found}
+        except Exception as e:
+            if isinstance(e, (NotFoundError, ValidationError)):
+                raise
+            logger.error(f"Error bulk updating document status in OrderReq {order_req_id}: {str(e)}")
+            raise DatabaseError(f"Failed to update document status: {str(e)}")
+
     @staticmethod
     async def soft_delete_order_req_document(order_req_id: str, s3_key: str, deleted_by: str) -> bool:
         """Soft delete a document from OrderReq Documents array by marking it as deleted"""
@@ -568,17 +629,19 @@ class OrderReqService:
             if not doc:
                 raise NotFoundError("OrderReq with Documents.s3_key", f"{order_req_id}/{s3_key}")
 
-            # Check if document is already deleted
-            if doc.Documents:
-                for document in doc.Documents:
-                    if document.get('s3_key') == s3_key:
-                        if document.get('is_deleted', False):
-                            raise ConflictError(f"Document with s3_key {s3_key} is already deleted")
-                        break
+            # Check if document is already deleted (every entry with this s3_key)
+            if not any(
+                document.get('s3_key') == s3_key and not document.get('is_deleted', False)
+                for document in (doc.Documents or [])
+            ):
+                raise ConflictError(f"Document with s3_key {s3_key} is already deleted")
 
-            # Soft delete using positional operator $
+            # Soft delete the live entry using positional operator $
             result = await OrderReq.get_motor_collection().update_one(
-                {"OrderReqID": order_req_id, "Documents.s3_key": s3_key},
+                {
+                    "OrderReqID": order_req_id,
+                    "Documents": {"$elemMatch": {"s3_key": s3_key, "is_deleted": {"$ne": True}}}
+                },
                 {
                     "$set": {
                         "Documents.$.is_deleted": True,